@@ -3,18 +3,22 @@ import numpy as np
 import base64
 import json
 import random
-import asyncio
-from io import BytesIO
 from flask import Flask, request, jsonify, render_template, send_from_directory, url_for
 from flask_cors import CORS
 from PIL import Image
+from inference import get_engine, current_engine, process_memory
+from prediction_cache import PredictionCache, NearDuplicateCache, hash_bytes, hash_pixels
+from image_decoding import RAW_IMAGE_TYPES, decode_image_buffer
+from image_payload import AI_PAYLOAD_MAX_EDGE
+from preprocessing import MODEL_INPUT_SIZE
 
 # Import AI integration module (if available)
 try:
-    from ai_integration import check_api_availability, classify_with_gemini, classify_with_openai
+    from ai_integration import AI_MOSAIC, check_api_availability, classify_mosaic, query_providers, run_async, get_classification_statistics, get_provider_statistics
     AI_INTEGRATION_AVAILABLE = True
 except ImportError:
     AI_INTEGRATION_AVAILABLE = False
+    AI_MOSAIC = False
     print("⚠️ AI Integration module not available. Using local model only.")
     # Create a placeholder for the API availability check
     def check_api_availability():
@@ -44,62 +48,158 @@ CLASSES = ["O", "R", "H"]
 CLASS_NAMES = {"R": "Organic", "O": "Hazardous", "H": "Recycle"}
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.7"))
 
+# Maximum number of images accepted by /api/predict/batch
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", "32"))
+
+# Map external API category to our class format
+CATEGORY_MAPPING = {
+    "Organic": "R",
+    "Recyclable": "H",
+    "Hazardous": "O",
+    "Non-recyclable": "O"  # Treating non-recyclable as hazardous for now
+}
+
+# Results keyed by raw upload bytes ("raw:") and by decoded pixels ("px:")
+result_cache = PredictionCache()
+
+# Recent webcam frames per session, matched by perceptual hash
+frame_cache = NearDuplicateCache()
+
 # -----------------------------
 # Utility functions
 # -----------------------------
-def resize_with_padding(img):
-    """Mock resize function (not actually used in demo)"""
-    return img
+def build_result(predicted_class, confidence):
+    """Build the standard prediction response for a class code and confidence."""
+    return {
+        "class": predicted_class,
+        "class_name": CLASS_NAMES[predicted_class],
+        "confidence": confidence,
+        "confidence_percentage": round(confidence * 100, 1),
+        "is_confident": confidence >= CONFIDENCE_THRESHOLD,
+        "timestamp": os.path.basename(str(random.randint(10000000, 99999999)))
+    }
 
-async def process_image_with_ai(img):
-    """Process image using external AI APIs if available"""
+def predict_batch_local(images):
+    """
+    Classify a list of images with a single forward pass of the local model.
+    
+    Args:
+        images: List of RGB images as numpy arrays
+        
+    Returns:
+        List of prediction results in the same order as the input
+    """
+    predictions = get_engine().predict_images(images)
+    return results_from_predictions(predictions)
+
+def predict_local(img):
+    """Classify one image (PIL Image or RGB array) with the local model, batched with concurrent requests."""
+    if isinstance(img, Image.Image):
+        img = np.asarray(img.convert("RGB"))
+    row = get_engine().predict_image(img)
+    return results_from_predictions([row])[0]
+
+def results_from_predictions(predictions):
+    """Turn model output rows into prediction results."""
     results = []
-    api_status = check_api_availability()
+    for row in predictions:
+        predicted_idx = int(np.argmax(row))
+        result = build_result(CLASSES[predicted_idx], float(row[predicted_idx]))
+        result["ai_source"] = "local"
+        results.append(result)
+    return results
+
+def for_widget(result, message='Classification complete'):
+    """
+    Add the message sent to the parent window when the request comes from the widget.
+
+    Results are cached without it, so this returns a copy and leaves result as it is.
+    """
+    if request.args.get('widget', 'false').lower() != 'true':
+        return result
+    return dict(result, widget_message=message)
+
+def decode_size(local_only=False):
+    """
+    Size (height, width) a decoded upload must still cover.
+
+    The local model only needs MODEL_INPUT_SIZE, so large JPEGs can be decoded
+    at a reduced scale. Images that may go to Gemini/OpenAI are kept at the
+    payload size (AI_PAYLOAD_MAX_EDGE) so the providers don't get a thumbnail.
+    """
+    if local_only or not AI_INTEGRATION_AVAILABLE:
+        return MODEL_INPUT_SIZE
+    return (AI_PAYLOAD_MAX_EDGE, AI_PAYLOAD_MAX_EDGE)
+
+def decode_base64(image_data):
+    """Decode a base64 string (optionally a data URL) into the encoded image bytes."""
+    # Remove data URL prefix if present
+    if 'base64,' in image_data:
+        image_data = image_data.split('base64,')[1]
+    return base64.b64decode(image_data)
+
+def result_from_ai(api_result):
+    """Build the standard prediction response from an external provider's result."""
+    predicted_class = CATEGORY_MAPPING.get(api_result["class_name"], "O")
+    confidence = api_result["confidence"]
     
-    # Use Gemini API if available
-    if api_status["gemini"]:
-        try:
-            gemini_result = await classify_with_gemini(img)
-            if "error" not in gemini_result:
-                results.append(gemini_result)
-        except Exception as e:
-            print(f"Error with Gemini API: {str(e)}")
+    result = {
+        "class": predicted_class,
+        "class_name": CLASS_NAMES[predicted_class],
+        "confidence": confidence,
+        "confidence_percentage": round(confidence * 100, 1),
+        "is_confident": confidence >= CONFIDENCE_THRESHOLD,
+        "timestamp": os.path.basename(str(random.randint(10000000, 99999999))),
+        "ai_source": api_result.get("source", "unknown"),
+        "reasoning": api_result.get("reasoning", "")
+    }
+    # Hedged mode reports whether a second provider was asked and after how long,
+    # mosaic batching which grid tile the answer came from
+    for key in ("hedged", "hedge_delay_ms", "mosaic_tile"):
+        if key in api_result:
+            result[key] = api_result[key]
+    return result
+
+def fallback_result(image_data):
+    """Result from the local model for an image the providers didn't classify, or a mock prediction without one."""
+    if get_engine() is not None:
+        return predict_local(image_data)
+    predicted_idx = random.randint(0, 2)
+    predicted_class = CLASSES[predicted_idx]
+    confidence = random.uniform(0.7, 0.98)  # Random confidence between 70% and 98%
+    return build_result(predicted_class, confidence)
+
+def process_images_with_mosaic(images):
+    """
+    Classify a batch of RGB arrays with as few external API requests as possible.
     
-    # Use OpenAI API if available
-    if api_status["openai"]:
-        try:
-            openai_result = classify_with_openai(img)
-            if "error" not in openai_result:
-                results.append(openai_result)
-        except Exception as e:
-            print(f"Error with OpenAI API: {str(e)}")
+    Images are sent to the provider as numbered grids. An image that neither
+    its grid nor the per-image call could classify gets fallback_result(),
+    so the paid APIs aren't asked about it a third time.
+    """
+    pil_images = [Image.fromarray(img) for img in images]
+    api_results = run_async(classify_mosaic(pil_images))
+    return [
+        result_from_ai(api_result) if api_result is not None else fallback_result(img)
+        for img, api_result in zip(images, api_results)
+    ]
+
+async def process_image_with_ai(img, image_key=None):
+    """Process image using external AI APIs if available"""
+    results = []
+    
+    # Query every configured API concurrently, or hedged with AI_HEDGE (each has its own timeout)
+    for api_result in await query_providers(img, image_key, CONFIDENCE_THRESHOLD):
+        if "error" in api_result:
+            print(f"Error with {api_result['source']} API: {api_result['error']}")
+        else:
+            results.append(api_result)
     
     # If we have results from external APIs, combine them
     if results:
         # Simple ensemble: use the prediction with highest confidence
         best_result = max(results, key=lambda x: x.get("confidence", 0))
-        
-        # Map external API category to our class format
-        category_mapping = {
-            "Organic": "R",
-            "Recyclable": "H",
-            "Hazardous": "O",
-            "Non-recyclable": "O"  # Treating non-recyclable as hazardous for now
-        }
-        
-        predicted_class = category_mapping.get(best_result["class_name"], "O")
-        confidence = best_result["confidence"]
-        
-        return {
-            "class": predicted_class,
-            "class_name": CLASS_NAMES[predicted_class],
-            "confidence": confidence,
-            "confidence_percentage": round(confidence * 100, 1),
-            "is_confident": confidence >= CONFIDENCE_THRESHOLD,
-            "timestamp": os.path.basename(str(random.randint(10000000, 99999999))),
-            "ai_source": best_result.get("source", "unknown"),
-            "reasoning": best_result.get("reasoning", "")
-        }
+        return result_from_ai(best_result)
     
     return None
 
@@ -117,58 +217,35 @@ def process_image(image_data):
         confidence = random.uniform(0.7, 0.98)  # Random confidence between 70% and 98%
         
         # Prepare result
-        result = {
-            "class": predicted_class,
-            "class_name": CLASS_NAMES[predicted_class],
-            "confidence": confidence,
-            "confidence_percentage": round(confidence * 100, 1),
-            "is_confident": confidence >= CONFIDENCE_THRESHOLD,
-            "timestamp": os.path.basename(str(random.randint(10000000, 99999999)))
-        }
+        result = build_result(predicted_class, confidence)
         
         # Add a message to send to parent window when in widget mode
-        if request.args.get('widget', 'false').lower() == 'true':
-            result['widget_message'] = 'Classification complete'
-        
-        return result
+        return for_widget(result)
+    
+    # Identical pixels (e.g. the same photo re-encoded) reuse the previous result
+    image_key = hash_pixels(image_data)
+    pixel_key = "px:" + image_key
+    cached = result_cache.get(pixel_key)
+    if cached is not None:
+        return for_widget(cached)
     
     # Try to use AI APIs if available
     if AI_INTEGRATION_AVAILABLE:
         try:
-            # Run the async function in a synchronous context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            ai_result = loop.run_until_complete(process_image_with_ai(img))
-            loop.close()
+            # Run the async function on the worker's long-lived event loop
+            ai_result = run_async(process_image_with_ai(img, image_key))
             
             if ai_result:
+                result_cache.put(pixel_key, ai_result)
                 # Add a message to send to parent window when in widget mode
-                if request.args.get('widget', 'false').lower() == 'true':
-                    ai_result['widget_message'] = 'Classification complete with AI'
-                return ai_result
+                return for_widget(ai_result, 'Classification complete with AI')
         except Exception as e:
             print(f"Error using AI integration: {str(e)}")
     
-    # Fallback to mock predictions
-    predicted_idx = random.randint(0, 2)
-    predicted_class = CLASSES[predicted_idx]
-    confidence = random.uniform(0.7, 0.98)  # Random confidence between 70% and 98%
-    
-    # Prepare result
-    result = {
-        "class": predicted_class,
-        "class_name": CLASS_NAMES[predicted_class],
-        "confidence": confidence,
-        "confidence_percentage": round(confidence * 100, 1),
-        "is_confident": confidence >= CONFIDENCE_THRESHOLD,
-        "timestamp": os.path.basename(str(random.randint(10000000, 99999999)))
-    }
-    
+    result = fallback_result(image_data)
+    result_cache.put(pixel_key, result)
     # Add a message to send to parent window when in widget mode
-    if request.args.get('widget', 'false').lower() == 'true':
-        result['widget_message'] = 'Classification complete'
-    
-    return result
+    return for_widget(result)
 
 # -----------------------------
 # API Routes
@@ -204,57 +281,122 @@ def favicon():
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
-    if 'image' not in request.files and 'image_data' not in request.json and 'file' not in request.files and 'file' not in request.form:
+    # Raw image bodies (Content-Type: image/jpeg, image/png, ...) skip base64 and form parsing
+    is_raw_upload = request.mimetype in RAW_IMAGE_TYPES
+    payload = {} if is_raw_upload else (request.get_json(silent=True) or {})
+    if not is_raw_upload and 'image' not in request.files and 'image_data' not in payload and 'file' not in request.files and 'file' not in request.form:
         return jsonify({"error": "No image provided"}), 400
     
     try:
+        # Handle raw binary upload (webcam Blob)
+        if is_raw_upload:
+            img_bytes = request.get_data()
+            if not img_bytes:
+                return jsonify({"error": "No image provided"}), 400
+        
         # Handle file upload from file input
-        if 'image' in request.files:
-            file = request.files['image']
-            img = Image.open(file.stream)
-            img_array = np.array(img)
-            result = process_image(img_array)
-            return jsonify(result)
+        elif 'image' in request.files:
+            img_bytes = request.files['image'].read()
         
         # Handle file upload from alternative field name
         elif 'file' in request.files:
-            file = request.files['file']
-            img = Image.open(file.stream)
-            img_array = np.array(img)
-            result = process_image(img_array)
-            return jsonify(result)
+            img_bytes = request.files['file'].read()
         
-        # Handle base64 image data from JSON
-        elif 'image_data' in request.json:
-            image_data = request.json['image_data']
-            # Remove data URL prefix if present
-            if 'base64,' in image_data:
-                image_data = image_data.split('base64,')[1]
-            
-            # Decode base64 image
-            img_bytes = base64.b64decode(image_data)
-            img = Image.open(BytesIO(img_bytes))
-            img_array = np.array(img)
-            result = process_image(img_array)
-            return jsonify(result)
+        # Handle base64 image data from JSON, or from form (camera capture)
+        else:
+            img_bytes = decode_base64(payload['image_data'] if 'image_data' in payload else request.form['file'])
+        
+        # Resubmitted uploads (retries, double clicks) skip decoding entirely
+        raw_key = "raw:" + hash_bytes(img_bytes)
+        cached = result_cache.get(raw_key)
+        if cached is not None:
+            return jsonify(for_widget(cached))
+        
+        # Decode straight from the request buffer into an RGB array, at a reduced
+        # JPEG scale when the upload is much larger than needed
+        img_array = decode_image_buffer(memoryview(img_bytes), decode_size())
         
-        # Handle base64 image data from form (camera capture)
-        elif 'file' in request.form:
-            image_data = request.form['file']
-            # Remove data URL prefix if present
-            if 'base64,' in image_data:
-                image_data = image_data.split('base64,')[1]
+        # Continuous webcam frames of a static scene reuse the last classification
+        session_id = request.headers.get('X-Session-ID') or payload.get('session_id') or request.form.get('session_id')
+        if session_id:
+            cached, frame_hash = frame_cache.lookup(session_id, img_array)
+            if cached is not None:
+                return jsonify(for_widget(cached))
+        
+        result = process_image(img_array)
+        # Widget-only fields aren't cached: the next request for these pixels may not come from the widget
+        cacheable = {key: value for key, value in result.items() if key != 'widget_message'}
+        result_cache.put(raw_key, cacheable)
+        if session_id:
+            frame_cache.store(session_id, frame_hash, cacheable)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Classify several images in one request with one forward pass of the local model."""
+    # Collect raw inputs from multipart parts or a JSON array of base64 strings
+    files = request.files.getlist('images') + request.files.getlist('image') + request.files.getlist('file')
+    payload = request.get_json(silent=True) or {}
+    encoded_images = payload.get('images', []) if isinstance(payload, dict) else []
+    
+    total = len(files) + len(encoded_images)
+    if total == 0:
+        return jsonify({"error": "No images provided"}), 400
+    if total > MAX_BATCH_IMAGES:
+        return jsonify({"error": f"Too many images: {total} (maximum is {MAX_BATCH_IMAGES})"}), 400
+    
+    try:
+        # Decode everything first so undecodable images don't abort the batch
+        images = []
+        results = [None] * total
+        min_size = decode_size(local_only=get_engine() is not None)
+        for index, source in enumerate(files + encoded_images):
+            try:
+                img_bytes = decode_base64(source) if isinstance(source, str) else source.read()
+                images.append((index, decode_image_buffer(memoryview(img_bytes), min_size)))
+            except Exception as e:
+                results[index] = {"index": index, "error": f"Could not decode image: {str(e)}"}
+        
+        if images:
+            if get_engine() is not None:
+                # One (N, 224, 224, 3) tensor, one model call
+                predictions = predict_batch_local([img for _, img in images])
+            elif AI_INTEGRATION_AVAILABLE and AI_MOSAIC and len(images) > 1:
+                # Several images per external API request
+                predictions = process_images_with_mosaic([img for _, img in images])
+            else:
+                predictions = [process_image(img) for _, img in images]
             
-            # Decode base64 image
-            img_bytes = base64.b64decode(image_data)
-            img = Image.open(BytesIO(img_bytes))
-            img_array = np.array(img)
-            result = process_image(img_array)
-            return jsonify(result)
+            for (index, _), result in zip(images, predictions):
+                result["index"] = index
+                results[index] = result
+        
+        return jsonify({
+            "count": total,
+            "batch_size": len(images),
+            "results": results
+        })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/stats')
+def stats():
+    """Expose runtime statistics for the local inference path."""
+    engine = current_engine()
+    return jsonify({
+        "local_model_loaded": engine is not None,
+        "inference": engine.get_statistics() if engine is not None else None,
+        "memory": process_memory(),
+        "result_cache": result_cache.get_statistics(),
+        "frame_cache": frame_cache.get_statistics(),
+        "classification": get_classification_statistics() if AI_INTEGRATION_AVAILABLE else None,
+        "providers": get_provider_statistics() if AI_INTEGRATION_AVAILABLE else None
+    })
+
 # -----------------------------
 # Main entry point
 # -----------------------------
@@ -263,5 +405,8 @@ if __name__ == "__main__":
     os.makedirs("templates", exist_ok=True)
     os.makedirs("static", exist_ok=True)
     
+    # Load the local model up front instead of on the first request
+    get_engine()
+    
     # Run the Flask app
     app.run(host='0.0.0.0', port=8081, debug=True)
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import sys
+import glob
+import argparse
+
+import numpy as np
+
+from image_decoding import decode_image_buffer
+from inference_backends import KerasBackend, load_backend
+from preprocessing import MODEL_INPUT_SIZE, preprocess_batch
+
+FORMATS = ("tflite-fp32", "tflite-fp16", "tflite-int8", "onnx")
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+# -----------------------------
+# Calibration data
+# -----------------------------
+def load_calibration_set(directory, limit):
+    """
+    Load and preprocess calibration images exactly as they are at serving time.
+
+    Args:
+        directory: Folder of sample images (searched recursively)
+        limit: Maximum number of images to use
+
+    Returns:
+        float32 array of shape (N, 224, 224, 3)
+    """
+    paths = sorted(path for pattern in IMAGE_PATTERNS
+                   for path in glob.glob(os.path.join(directory, "**", pattern), recursive=True))[:limit]
+    if not paths:
+        raise SystemExit(f"Error: no calibration images found in '{directory}'")
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(decode_image_buffer(f.read(), MODEL_INPUT_SIZE))
+    return preprocess_batch(images)
+
+def random_calibration_set(count):
+    """Random images; only good enough to smoke-test the conversion, not to calibrate int8."""
+    print("⚠️ No --calibration-dir given: using random images. int8 accuracy will not be representative.")
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, MODEL_INPUT_SIZE + (3,), dtype=np.uint8) for _ in range(count)]
+    return preprocess_batch(images)
+
+
+# -----------------------------
+# Converters
+# -----------------------------
+def export_tflite(model, output_path, quantization, calibration):
+    """
+    Convert a Keras model to a TFLite flatbuffer.
+
+    Args:
+        model: Loaded Keras model
+        output_path: Destination .tflite file
+        quantization: "fp32", "fp16" (float16 weights) or "int8" (full integer post-training quantization)
+        calibration: Preprocessed images used as the int8 representative dataset
+    """
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == "fp16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        def representative_dataset():
+            for image in calibration:
+                yield [image[np.newaxis]]
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Keep float32 input/output so callers don't need to know the quantization parameters
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+def export_onnx(model, output_path, opset=13, external_data=False):
+    """
+    Convert a Keras model to ONNX with a dynamic batch dimension.
+
+    Args:
+        model: Loaded Keras model
+        output_path: Destination .onnx file
+        opset: ONNX opset version
+        external_data: Store the weights in a separate "<output>.data" file,
+            which ONNX Runtime memory-maps so server workers share one copy
+    """
+    import tensorflow as tf
+    import tf2onnx
+    spec = (tf.TensorSpec((None,) + MODEL_INPUT_SIZE + (3,), tf.float32, name="input"),)
+    model_proto, _ = tf2onnx.convert.from_function(
+        tf.function(lambda x: model(x, training=False)),
+        input_signature=spec, opset=opset, output_path=None if external_data else output_path
+    )
+    if external_data:
+        import onnx
+        data_path = output_path + ".data"
+        if os.path.exists(data_path):
+            os.remove(data_path)  # onnx appends to an existing data file
+        onnx.save_model(model_proto, output_path, save_as_external_data=True, all_tensors_to_one_file=True,
+                        location=os.path.basename(data_path), size_threshold=1024)
+
+
+# -----------------------------
+# Parity check
+# -----------------------------
+def check_parity(reference, candidate, calibration, batch_size=8):
+    """
+    Compare a converted backend against the original Keras model.
+
+    Returns:
+        Dictionary with top-1 agreement and the largest probability difference
+    """
+    expected, actual = [], []
+    for start in range(0, len(calibration), batch_size):
+        batch = calibration[start:start + batch_size]
+        expected.append(reference.predict(batch))
+        actual.append(candidate.predict(batch))
+    expected, actual = np.concatenate(expected), np.concatenate(actual)
+    return {
+        "top1_agreement": float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))),
+        "max_abs_diff": float(np.abs(expected - actual).max())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the MobileNetV2 waste model to TFLite/ONNX and check parity")
+    parser.add_argument("model", help="Path to the Keras model (.keras/.h5)")
+    parser.add_argument("--output-dir", default="models", help="Where to write the converted models")
+    parser.add_argument("--formats", default=",".join(FORMATS), help=f"Comma-separated subset of: {', '.join(FORMATS)}")
+    parser.add_argument("--calibration-dir", help="Folder of sample images for int8 calibration and the parity check")
+    parser.add_argument("--calibration-size", type=int, default=200, help="Maximum calibration images")
+    parser.add_argument("--onnx-external-data", action="store_true",
+                        help="Write ONNX weights to a separate memory-mappable .data file (shared across workers)")
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="Fail if a converted model's top-1 agreement with Keras is below this")
+    args = parser.parse_args()
+
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise SystemExit(f"Error: unknown format(s): {', '.join(sorted(unknown))}")
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.model)
+    reference = KerasBackend(model=model)
+    if args.calibration_dir:
+        calibration = load_calibration_set(args.calibration_dir, args.calibration_size)
+    else:
+        calibration = random_calibration_set(min(args.calibration_size, 32))
+    print(f"Loaded {args.model} and {len(calibration)} calibration images")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+    failed = False
+    for name in formats:
+        if name == "onnx":
+            output_path = os.path.join(args.output_dir, f"{stem}.onnx")
+            export_onnx(model, output_path, external_data=args.onnx_external_data)
+        else:
+            quantization = name.split("-")[1]
+            output_path = os.path.join(args.output_dir, f"{stem}_{quantization}.tflite")
+            export_tflite(model, output_path, quantization, calibration)
+
+        parity = check_parity(reference, load_backend(output_path), calibration)
+        ok = parity["top1_agreement"] >= args.min_agreement
+        failed = failed or not ok
+        size_mb = sum(os.path.getsize(path) for path in (output_path, output_path + ".data")
+                      if os.path.exists(path)) / (1024 * 1024)
+        print(f"{'✅' if ok else '❌'} {name:<12} {output_path} ({size_mb:.1f} MB) "
+              f"top-1 agreement {parity['top1_agreement'] * 100:.1f}%, max |Δp| {parity['max_abs_diff']:.4f}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mosaic import WASTE_CATEGORIES
+
+_GEMINI_PATH = re.compile(r"^/v1(?:beta)?/models/(?P<model>[^/:]+):generateContent$")
+_OPENAI_PATH = "/v1/chat/completions"
+_MOSAIC_PROMPT = re.compile(r"grid of (\d+) numbered tiles")
+
+
+# -----------------------------
+# Failure profile
+# -----------------------------
+class Profile:
+    def __init__(self, latency="fixed:0", error_rate=0.0, malformed_rate=0.0,
+                 burst_every=0.0, burst_duration=0.0, seed=None):
+        """
+        How the fake providers behave.
+
+        Args:
+            latency: Response delay distribution in milliseconds:
+                "fixed:MS", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA"
+            error_rate: Fraction of requests answered with HTTP 500
+            malformed_rate: Fraction of requests whose answer text isn't valid JSON
+            burst_every: Seconds between 429 bursts (0 disables them)
+            burst_duration: Seconds each 429 burst lasts
+            seed: Random seed, for reproducible runs
+        """
+        kind, _, params = latency.partition(":")
+        self.latency_kind = kind
+        self.latency_params = [float(value) for value in params.split(",") if value]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.burst_every = burst_every
+        self.burst_duration = burst_duration
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def delay(self):
+        """Seconds to wait before answering."""
+        params = self.latency_params or [0.0]
+        with self.lock:
+            if self.latency_kind == "uniform":
+                ms = self.random.uniform(params[0], params[1])
+            elif self.latency_kind == "lognormal":
+                ms = params[0] * self.random.lognormvariate(0.0, params[1] if len(params) > 1 else 0.5)
+            else:
+                ms = params[0]
+        return max(0.0, ms) / 1000.0
+
+    def in_burst(self):
+        """Whether requests are being rate limited right now."""
+        if self.burst_every <= 0:
+            return False
+        return (time.monotonic() - self.started) % self.burst_every < self.burst_duration
+
+    def chance(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def classification(self, prompt):
+        """Answer text for a prompt: one JSON object, or an array for mosaic prompts."""
+        with self.lock:
+            if self.random.random() < self.malformed_rate:
+                return "I think this is probably recyclable, but I'm not sure."
+            mosaic = _MOSAIC_PROMPT.search(prompt)
+            answers = [
+                {
+                    "category": self.random.choice(WASTE_CATEGORIES),
+                    "confidence": self.random.randint(55, 98),
+                    "reasoning": "Fake provider answer"
+                }
+                for _ in range(int(mosaic.group(1)) if mosaic else 1)
+            ]
+        if mosaic:
+            return json.dumps([dict(answer, tile=tile) for tile, answer in enumerate(answers, start=1)])
+        return json.dumps(answers[0])
+
+
+# -----------------------------
+# Request handling
+# -----------------------------
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+    profile = Profile()
+    stats = {"requests": 0, "errors": 0, "rate_limited": 0, "malformed": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+            return self.stats[key]
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.stats_lock:
+                return self._send_json(200, dict(self.stats))
+        self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        gemini = _GEMINI_PATH.match(self.path.split("?")[0])
+        if not gemini and self.path.split("?")[0] != _OPENAI_PATH:
+            return self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+        request_number = self._count("requests")
+
+        time.sleep(self.profile.delay())
+        if self.profile.in_burst():
+            self._count("rate_limited")
+            return self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                                                   "status": "RESOURCE_EXHAUSTED", "type": "rate_limit_exceeded"}})
+        if self.profile.chance(self.profile.error_rate):
+            self._count("errors")
+            return self._send_json(500, {"error": {"code": 500, "message": "Internal error", "status": "INTERNAL",
+                                                   "type": "server_error"}})
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"code": 400, "message": "Invalid JSON", "status": "INVALID_ARGUMENT"}})
+        prompt = _prompt_text(request, gemini is not None)
+        text = self.profile.classification(prompt)
+        if not text.startswith(("{", "[")):
+            self._count("malformed")
+
+        if gemini:
+            return self._send_json(200, {
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": 300, "candidatesTokenCount": 40, "totalTokenCount": 340},
+                "modelVersion": gemini.group("model")
+            })
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{request_number}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 300, "completion_tokens": 40, "total_tokens": 340}
+        })
+
+
+def _prompt_text(request, gemini):
+    """All text parts of a Gemini or OpenAI request body."""
+    texts = []
+    if gemini:
+        for content in request.get("contents", []):
+            texts += [part.get("text", "") for part in content.get("parts", [])]
+    else:
+        for message in request.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, str):
+                texts.append(content)
+            elif isinstance(content, list):
+                texts += [part.get("text", "") for part in content if part.get("type") == "text"]
+    return "\n".join(texts)
+
+
+def start_server(profile, host="127.0.0.1", port=0):
+    """
+    Run the fake providers on a background thread.
+
+    Args:
+        profile: Profile describing latency and failures
+        host: Interface to listen on
+        port: Port (0 picks a free one)
+
+    Returns:
+        The ThreadingHTTPServer; its base URL is http://host:server_port
+    """
+    handler = type("ProfiledHandler", (FakeProviderHandler,), {
+        "profile": profile,
+        "stats": {"requests": 0, "errors": 0, "rate_limited": 0, "malformed": 0},
+        "stats_lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-providers", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini and OpenAI APIs used by ai_integration.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="lognormal:800,0.4",
+                        help='Response delay in ms: "fixed:MS", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA"')
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of answers that aren't valid JSON")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Seconds between HTTP 429 bursts (0: none)")
+    parser.add_argument("--burst-duration", type=float, default=5.0, help="Seconds each 429 burst lasts")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    args = parser.parse_args()
+
+    profile = Profile(args.latency, args.error_rate, args.malformed_rate, args.burst_every, args.burst_duration, args.seed)
+    server = start_server(profile, args.host, args.port)
+    base = f"http://{args.host}:{server.server_port}"
+    print(f"ℹ️ Fake providers listening on {base}")
+    print(f"   OPENAI_BASE_URL={base}/v1")
+    print(f"   GEMINI_API_ENDPOINT={base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+
+# -----------------------------
+# Gunicorn settings
+# -----------------------------
+# Usage: gunicorn -c gunicorn.conf.py app:app
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# Import the app once in the master so Flask, NumPy, OpenCV and the API
+# clients are shared copy-on-write by every worker. The model itself is
+# not loaded here: TensorFlow and ONNX Runtime start thread pools that
+# don't survive fork(). Each worker loads it instead, and with a TFLite
+# or external-data ONNX model (INFERENCE_SHARE_WEIGHTS=true) the weights
+# are memory-mapped from the file, so the page cache holds one copy per host.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def post_worker_init(worker):
+    """Load the model before the worker accepts requests and log its memory."""
+    from inference import get_engine, process_memory
+    get_engine()
+    usage = process_memory()
+    worker.log.info(
+        "Worker %s ready: RSS %s MB, PSS %s MB (shared %s MB)",
+        usage["pid"], usage.get("rss_mb"), usage.get("pss_mb"), usage.get("shared_clean_mb")
+    )
@@ -0,0 +1,116 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# OpenCV decodes straight from a buffer; PIL is the fallback when it isn't installed
+try:
+    import cv2
+    CV2_AVAILABLE = True
+    CV2_REDUCED_FLAGS = {
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }
+except ImportError:
+    CV2_AVAILABLE = False
+
+# Content types accepted as raw request bodies
+RAW_IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/webp"}
+
+# DCT-domain scale factors supported by libjpeg, largest first
+JPEG_SCALES = (8, 4, 2)
+
+# JPEG start-of-frame markers (all except DHT, JPG and DAC, which share the range)
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+# -----------------------------
+# JPEG header inspection
+# -----------------------------
+def jpeg_size(buffer):
+    """
+    Read the dimensions of a JPEG from its frame header without decoding it.
+
+    Args:
+        buffer: bytes-like object holding the encoded file
+
+    Returns:
+        (width, height) tuple, or None if the buffer isn't a readable JPEG
+    """
+    data = memoryview(buffer).cast("B")
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    pos = 2
+    while pos + 9 < len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = (data[pos + 5] << 8) | data[pos + 6]
+            width = (data[pos + 7] << 8) | data[pos + 8]
+            return width, height
+        pos += 2 + ((data[pos + 2] << 8) | data[pos + 3])
+    return None
+
+def reduced_scale(size, min_size):
+    """
+    Pick the largest JPEG scale factor that still covers the target size.
+
+    Letterboxing only needs one side to reach the target, so a side at
+    least as long as the matching target side is enough to avoid upscaling.
+
+    Args:
+        size: (width, height) of the full image
+        min_size: (height, width) of the model input
+
+    Returns:
+        Scale factor (1, 2, 4 or 8)
+    """
+    width, height = size
+    for scale in JPEG_SCALES:
+        if -(-height // scale) >= min_size[0] or -(-width // scale) >= min_size[1]:
+            return scale
+    return 1
+
+
+# -----------------------------
+# Image decoding
+# -----------------------------
+def decode_image_buffer(buffer, min_size=None):
+    """
+    Decode an encoded image directly from a bytes-like buffer.
+
+    The buffer is wrapped, not copied: the only allocation is the decoded
+    pixel array, and the BGR->RGB swap happens in place. When min_size is
+    given, JPEGs are decoded at a reduced DCT scale (1/2, 1/4 or 1/8) that
+    still covers it, which skips most of the work for large photos. Other
+    formats are decoded at full size.
+
+    Args:
+        buffer: bytes, bytearray or memoryview holding a JPEG/PNG/WebP file
+        min_size: Optional (height, width) the decoded image must still cover
+
+    Returns:
+        RGB numpy array of shape (H, W, 3)
+    """
+    scale = 1
+    if min_size is not None:
+        size = jpeg_size(buffer)
+        if size is not None:
+            scale = reduced_scale(size, min_size)
+
+    if CV2_AVAILABLE:
+        encoded = np.frombuffer(buffer, dtype=np.uint8)
+        img = cv2.imdecode(encoded, CV2_REDUCED_FLAGS.get(scale, cv2.IMREAD_COLOR))
+        if img is None:
+            raise ValueError("Could not decode image data")
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+    with Image.open(BytesIO(buffer)) as img:
+        if scale > 1:
+            img.draft("RGB", (img.width // scale, img.height // scale))
+        return np.asarray(img.convert("RGB"))
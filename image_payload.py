@@ -0,0 +1,142 @@
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from prediction_cache import PredictionCache
+
+# -----------------------------
+# Payload settings
+# -----------------------------
+AI_PAYLOAD_MAX_EDGE = int(os.getenv("AI_PAYLOAD_MAX_EDGE", "1024"))  # Longest side sent to the providers
+AI_PAYLOAD_TARGET_BYTES = int(os.getenv("AI_PAYLOAD_TARGET_BYTES", "150000"))  # JPEG size to aim for
+AI_PAYLOAD_MIN_QUALITY = int(os.getenv("AI_PAYLOAD_MIN_QUALITY", "40"))
+AI_PAYLOAD_MAX_QUALITY = int(os.getenv("AI_PAYLOAD_MAX_QUALITY", "90"))
+AI_PAYLOAD_CACHE_BYTES = int(os.getenv("AI_PAYLOAD_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def _encode_jpeg(image, quality):
+    buffered = BytesIO()
+    # No exif/icc_profile arguments: the output carries no metadata
+    image.save(buffered, format="JPEG", quality=quality, optimize=True)
+    return buffered.getvalue()
+
+def optimize_jpeg(image, max_edge=AI_PAYLOAD_MAX_EDGE, target_bytes=AI_PAYLOAD_TARGET_BYTES,
+                  min_quality=AI_PAYLOAD_MIN_QUALITY, max_quality=AI_PAYLOAD_MAX_QUALITY):
+    """
+    Encode an image as a small JPEG for a vision API.
+
+    The image is turned upright from its EXIF orientation, converted to
+    RGB and downsized so its long edge is at most max_edge. The JPEG
+    quality is then binary-searched for the highest value whose output
+    fits target_bytes (min_quality if none does). EXIF, ICC and other
+    metadata are dropped.
+
+    Args:
+        image: PIL Image
+        max_edge: Longest side in pixels (0 keeps the original size)
+        target_bytes: Size budget for the encoded JPEG
+        min_quality: Lowest JPEG quality tried
+        max_quality: Highest JPEG quality tried
+
+    Returns:
+        Tuple (JPEG bytes, quality used)
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if max_edge and max(image.size) > max_edge:
+        scale = max_edge / max(image.size)
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+    best = None
+    low, high = min_quality, max_quality
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode_jpeg(image, quality)
+        if len(data) <= target_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best or (_encode_jpeg(image, min_quality), min_quality)
+
+
+# Encoded payloads are bytes, so they are sized and returned as they are
+class PayloadCache(PredictionCache):
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def _estimate_size(key, value):
+        return len(key) + len(value) + 64
+
+
+# Encoded payloads per image hash; retries and hedged calls reuse them
+payload_cache = PayloadCache(max_bytes=AI_PAYLOAD_CACHE_BYTES)
+
+_stats_lock = threading.Lock()
+_encode_stats = {"encodes": 0, "bytes": 0, "quality_total": 0}
+_sent_stats = {}  # provider -> {"requests", "bytes"}
+
+def encode_payload(image, image_key=None):
+    """
+    Encode an image with optimize_jpeg() and cache the result.
+
+    Args:
+        image: PIL Image
+        image_key: hash_pixels() of the image, used as the payload_cache key
+            (without it nothing is cached)
+
+    Returns:
+        JPEG bytes
+    """
+    data, quality = optimize_jpeg(image)
+    with _stats_lock:
+        _encode_stats["encodes"] += 1
+        _encode_stats["bytes"] += len(data)
+        _encode_stats["quality_total"] += quality
+    if image_key is not None:
+        payload_cache.put(image_key, data)
+    return data
+
+
+# -----------------------------
+# Statistics
+# -----------------------------
+def record_sent(provider, size):
+    """Count the image bytes put into one request to a provider."""
+    with _stats_lock:
+        stats = _sent_stats.setdefault(provider, {"requests": 0, "bytes": 0})
+        stats["requests"] += 1
+        stats["bytes"] += size
+
+def get_statistics():
+    """
+    Get statistics about image payloads sent to the providers.
+
+    Returns:
+        Dictionary with encode counts, average JPEG size and quality, the
+        payload cache and bytes sent per provider
+    """
+    with _stats_lock:
+        encodes = _encode_stats["encodes"]
+        sent = {
+            provider: dict(stats, average_bytes=round(stats["bytes"] / stats["requests"]) if stats["requests"] else 0)
+            for provider, stats in _sent_stats.items()
+        }
+        return {
+            "max_edge": AI_PAYLOAD_MAX_EDGE,
+            "target_bytes": AI_PAYLOAD_TARGET_BYTES,
+            "encodes": encodes,
+            "average_bytes": round(_encode_stats["bytes"] / encodes) if encodes else 0,
+            "average_quality": round(_encode_stats["quality_total"] / encodes, 1) if encodes else 0.0,
+            "cache": payload_cache.get_statistics(),
+            "sent": sent
+        }
@@ -0,0 +1,253 @@
+import os
+import time
+import threading
+
+import numpy as np
+
+from inference_backends import load_backend
+from inference_scheduler import MicroBatchScheduler
+from preprocessing import MODEL_INPUT_SIZE, preprocess_image, preprocess_batch
+
+# -----------------------------
+# Model settings
+# -----------------------------
+# .keras, .tflite or .onnx - the inference backend is picked from the extension (or INFERENCE_BACKEND)
+MODEL_PATH = os.getenv("MODEL_PATH", "models/best_mobilenetv2_model.keras")
+INFERENCE_WARMUP = os.getenv("INFERENCE_WARMUP", "true").lower() == "true"
+# Unix socket of an inference_server.py process to use instead of a local model
+INFERENCE_SERVER_SOCKET = os.getenv("INFERENCE_SERVER_SOCKET", "")
+
+# Model output order and display names
+CLASSES = ["O", "R", "H"]
+CLASS_NAMES = {"R": "Organic", "O": "Hazardous", "H": "Recycle"}
+
+
+# Local inference engine (one per process)
+class InferenceEngine:
+    def __init__(self, backend, model_path=None):
+        """
+        Wrap a loaded inference backend with request batching.
+
+        Args:
+            backend: Backend from inference_backends (anything with predict(batch))
+            model_path: Path the backend was loaded from, for reporting
+        """
+        self.backend = backend
+        self.model_path = model_path
+        self.name = getattr(backend, "name", "custom")
+        # Concurrent single-image requests share one batched model call
+        self.scheduler = MicroBatchScheduler(backend.predict)
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+
+    def predict(self, image, timeout=None):
+        """Class probabilities for one preprocessed (224, 224, 3) image, batched with concurrent callers."""
+        return self.scheduler.predict(image, timeout=timeout)
+
+    def predict_batch(self, batch):
+        """Class probabilities for a preprocessed (N, 224, 224, 3) batch in one forward pass."""
+        return self.backend.predict(batch)
+
+    def predict_image(self, img, bgr=False, timeout=None):
+        """
+        Preprocess and classify one raw image, batched with concurrent callers.
+
+        Args:
+            img: uint8 image as a numpy array
+            bgr: Whether the image is in BGR order
+            timeout: Optional seconds to wait before giving up (TimeoutError)
+
+        Returns:
+            Class probability row
+        """
+        # A job abandoned on timeout may still be read later, so it can't use the thread's buffer
+        out = np.empty(MODEL_INPUT_SIZE + (3,), dtype=np.float32) if timeout is not None else None
+        return self.predict(preprocess_image(img, bgr=bgr, out=out), timeout=timeout)
+
+    def predict_images(self, images):
+        """Preprocess and classify a list of raw RGB images in one forward pass."""
+        return self.predict_batch(preprocess_batch(images))
+
+    def warmup(self):
+        """Run throwaway predictions so the first real request doesn't pay for graph setup."""
+        start = time.perf_counter()
+        if hasattr(self.backend, "warmup"):
+            # Every compiled batch size, not just the first one used
+            self.backend.warmup()
+        else:
+            self.backend.predict(np.zeros((1,) + MODEL_INPUT_SIZE + (3,), dtype=np.float32))
+        self.warmup_seconds = time.perf_counter() - start
+
+    def get_statistics(self):
+        return {
+            "backend": self.name,
+            "model_path": self.model_path,
+            "load_seconds": round(self.load_seconds, 3),
+            "warmup_seconds": round(self.warmup_seconds, 3),
+            "batch_sizes": list(getattr(self.backend, "batch_sizes", [])),
+            "scheduler": self.scheduler.get_statistics()
+        }
+
+
+# -----------------------------
+# Lazy singleton
+# -----------------------------
+_engine = None
+_engine_loaded = False
+_engine_lock = threading.Lock()
+
+def get_engine(model_path=None, warmup=INFERENCE_WARMUP):
+    """
+    Return the process-wide inference engine, loading the model on first use.
+
+    Importing this module is cheap; the model (and its runtime) is only
+    loaded by the first caller, and concurrent first callers wait for that
+    single load instead of each loading their own copy. When
+    INFERENCE_SERVER_SOCKET is set, no model is loaded in this process at
+    all: the engine is a client of the out-of-process inference server.
+
+    Args:
+        model_path: Model file (defaults to MODEL_PATH)
+        warmup: Whether to run a warmup prediction after loading
+
+    Returns:
+        InferenceEngine (or InferenceClient), or None if the model file is
+        missing or fails to load
+    """
+    global _engine, _engine_loaded
+    if _engine_loaded:
+        return _engine
+    with _engine_lock:
+        if not _engine_loaded:
+            if INFERENCE_SERVER_SOCKET:
+                from inference_server import InferenceClient
+                _engine = InferenceClient(INFERENCE_SERVER_SOCKET)
+            else:
+                _engine = load_engine(model_path or MODEL_PATH, warmup)
+            _engine_loaded = True
+    return _engine
+
+def load_engine(model_path=MODEL_PATH, warmup=INFERENCE_WARMUP):
+    """Load a model into a new InferenceEngine, or return None if it can't be loaded."""
+    if not os.path.exists(model_path):
+        print(f"ℹ️ No local model found at {model_path}")
+        return None
+    try:
+        start = time.perf_counter()
+        engine = InferenceEngine(load_backend(model_path), model_path)
+        engine.load_seconds = time.perf_counter() - start
+        if warmup:
+            engine.warmup()
+        print(f"✅ Local model loaded from {model_path} ({engine.name} backend, {engine.load_seconds:.1f}s)")
+        return engine
+    except Exception as e:
+        print(f"⚠️ Could not load local model: {str(e)}")
+        return None
+
+def current_engine():
+    """Return the engine if it has already been loaded, without triggering a load."""
+    return _engine
+
+def set_engine(engine):
+    """Install an engine (or None for no local model), e.g. a backend loaded by a benchmark."""
+    global _engine, _engine_loaded
+    with _engine_lock:
+        _engine = engine
+        _engine_loaded = True
+
+
+# -----------------------------
+# Process memory
+# -----------------------------
+def process_memory():
+    """
+    Report this process's memory from /proc (Linux only).
+
+    RSS counts every resident page, including ones shared with other
+    workers. PSS splits shared pages evenly between the processes mapping
+    them, so summing PSS across workers gives the real host-wide footprint.
+
+    Returns:
+        Dictionary with pid and RSS/PSS/shared/private sizes in MB
+    """
+    usage = {"pid": os.getpid()}
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_clean_mb",
+              "Shared_Dirty": "shared_dirty_mb", "Private_Clean": "private_clean_mb",
+              "Private_Dirty": "private_dirty_mb"}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    usage[fields[name]] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+
+# -----------------------------
+# Ensemble entry point
+# -----------------------------
+def local_result(predictions):
+    """
+    Standardized ensemble result for a row of local model probabilities.
+
+    Args:
+        predictions: Class probabilities from engine.predict_image()
+
+    Returns:
+        Dictionary with source, class_name, confidence, margin and reasoning
+    """
+    predicted_idx = int(np.argmax(predictions))
+    predicted_class = CLASSES[predicted_idx]
+    confidence = float(predictions[predicted_idx])
+    # Gap to the runner-up class: a low margin means the model is torn between two classes
+    runner_up = float(np.partition(predictions, -2)[-2]) if len(predictions) > 1 else 0.0
+
+    return {
+        "source": "local",
+        "class_name": CLASS_NAMES.get(predicted_class, "Unknown"),
+        "confidence": confidence,
+        "margin": confidence - runner_up,
+        "reasoning": f"Local model prediction with {confidence*100:.1f}% confidence"
+    }
+
+def predict_local_model(image):
+    """
+    Run prediction on an image using the local model and return standardized result.
+
+    Args:
+        image: The image to analyze (PIL Image, RGB numpy array, or file path)
+
+    Returns:
+        Dictionary with standardized prediction result, or None if there is
+        no local model or the image is empty
+    """
+    engine = get_engine()
+    if engine is None:
+        return None
+    try:
+        # Convert to numpy array if needed
+        if isinstance(image, str) and os.path.exists(image):
+            from image_decoding import decode_image_buffer
+            with open(image, "rb") as f:
+                img_np = decode_image_buffer(f.read(), MODEL_INPUT_SIZE)
+        elif hasattr(image, "convert"):
+            img_np = np.asarray(image.convert("RGB"))
+        else:
+            img_np = image
+
+        # Validate image
+        if img_np is None or img_np.size == 0 or len(img_np.shape) < 2:
+            return None
+
+        return local_result(engine.predict_image(img_np))
+
+    except Exception as e:
+        print(f"Error in local model prediction: {e}")
+        return {
+            "source": "local",
+            "error": str(e),
+            "class_name": "Error",
+            "confidence": 0
+        }
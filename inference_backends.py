@@ -0,0 +1,226 @@
+import os
+import threading
+
+import numpy as np
+
+# -----------------------------
+# Backend settings
+# -----------------------------
+# keras | tflite | onnx (empty: chosen from the model file extension)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "").strip().lower()
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))  # 0 lets the runtime decide
+# Keep the weights in the memory-mapped model file instead of private per-process copies,
+# so every worker on a host shares one copy through the page cache
+INFERENCE_SHARE_WEIGHTS = os.getenv("INFERENCE_SHARE_WEIGHTS", "false").lower() == "true"
+# Batch sizes compiled ahead of time; other batches are zero-padded up to the next one
+INFERENCE_BATCH_SIZES = tuple(sorted({int(n) for n in os.getenv("INFERENCE_BATCH_SIZES", "1,2,4,8,16").split(",") if n.strip()}))
+
+
+def predict_padded(run, batch, batch_sizes):
+    """
+    Run a batch through a function that only accepts a fixed set of batch sizes.
+
+    The batch is zero-padded up to the smallest size that holds it, and
+    batches larger than the biggest size are split into chunks of that size.
+
+    Args:
+        run: Function taking a batch whose length is one of batch_sizes
+        batch: Input batch of any length
+        batch_sizes: Sorted supported batch sizes
+
+    Returns:
+        Model output rows for the real (unpadded) inputs
+    """
+    largest = batch_sizes[-1]
+    outputs = []
+    for start in range(0, len(batch), largest):
+        chunk = batch[start:start + largest]
+        size = next(n for n in batch_sizes if n >= len(chunk))
+        if size != len(chunk):
+            padded = np.zeros((size,) + chunk.shape[1:], dtype=chunk.dtype)
+            padded[:len(chunk)] = chunk
+            chunk_output = run(padded)[:len(chunk)]
+        else:
+            chunk_output = run(chunk)
+        outputs.append(chunk_output)
+    return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+
+# Keras / TensorFlow SavedModel backend
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model_path=None, model=None, batch_sizes=INFERENCE_BATCH_SIZES):
+        """
+        Run a Keras model with the full TensorFlow runtime.
+
+        model.predict() goes through Keras' data adapters and callbacks on
+        every call, which dominates single-image latency. Instead, one
+        concrete graph function is traced per batch size in batch_sizes and
+        called directly.
+
+        Args:
+            model_path: Path to a .keras/.h5 model file
+            model: Already loaded Keras model (used instead of model_path)
+            batch_sizes: Batch sizes to compile signatures for
+        """
+        import tensorflow as tf
+        if model is None:
+            if INFERENCE_SHARE_WEIGHTS:
+                print("⚠️ Keras models are loaded into each process; convert to TFLite or ONNX to share weights")
+            from tensorflow.keras.models import load_model
+            model = load_model(model_path)
+        self.model = model
+        self.input_shape = tuple(model.input_shape[1:])
+        self.batch_sizes = tuple(sorted(batch_sizes))
+        forward = tf.function(self._forward, autograph=False)
+        self._signatures = {
+            size: forward.get_concrete_function(tf.TensorSpec((size,) + self.input_shape, tf.float32))
+            for size in self.batch_sizes
+        }
+
+    def _forward(self, batch):
+        return self.model(batch, training=False)
+
+    def _run(self, batch):
+        return self._signatures[len(batch)](batch).numpy()
+
+    def predict(self, batch):
+        """Return class probabilities for an (N, 224, 224, 3) float32 batch."""
+        return predict_padded(self._run, batch, self.batch_sizes)
+
+    def warmup(self):
+        """Execute every compiled signature once; the first call of each pays for graph optimization."""
+        for size in self.batch_sizes:
+            self._run(np.zeros((size,) + self.input_shape, dtype=np.float32))
+
+
+# TensorFlow Lite backend (float32, float16 or int8 post-training quantized)
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=INFERENCE_THREADS, share_weights=INFERENCE_SHARE_WEIGHTS,
+                 batch_sizes=INFERENCE_BATCH_SIZES):
+        """
+        Run a .tflite flatbuffer with the TFLite interpreter.
+
+        Uses a standalone interpreter package (tflite_runtime or
+        ai_edge_litert) when installed, so the full TensorFlow runtime
+        never has to be imported. The flatbuffer is memory-mapped, so its
+        weights are shared by every process that loads the same file.
+
+        Args:
+            model_path: Path to a .tflite model file
+            num_threads: Interpreter threads (0 lets TFLite decide)
+            share_weights: Skip the XNNPACK delegate, which repacks the
+                weights into private memory, and run the builtin kernels
+                straight from the mapped file instead
+            batch_sizes: Input shapes to allow; batches are padded up to
+                one of them so tensors are rarely reallocated
+        """
+        try:
+            from tflite_runtime.interpreter import Interpreter, OpResolverType
+        except ImportError:
+            try:
+                from ai_edge_litert.interpreter import Interpreter, OpResolverType
+            except ImportError:
+                import tensorflow as tf
+                Interpreter, OpResolverType = tf.lite.Interpreter, tf.lite.experimental.OpResolverType
+        resolver = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES if share_weights else OpResolverType.AUTO
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads or None,
+                                       experimental_op_resolver_type=resolver)
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self.input_detail["shape"][1:])
+        self._batch_size = int(self.input_detail["shape"][0])
+        self.batch_sizes = tuple(sorted(batch_sizes))
+        # The interpreter is not thread-safe
+        self._lock = threading.Lock()
+
+    def _quantize(self, batch):
+        """Convert float input to the model's integer input type if it is fully quantized."""
+        dtype = self.input_detail["dtype"]
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = self.input_detail["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, output):
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self.output_detail["quantization"]
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def _run(self, batch):
+        if batch.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self.input_detail["index"], batch.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        self.interpreter.set_tensor(self.input_detail["index"], self._quantize(batch))
+        self.interpreter.invoke()
+        return self._dequantize(self.interpreter.get_tensor(self.output_detail["index"]))
+
+    def predict(self, batch):
+        """Return class probabilities for an (N, 224, 224, 3) float32 batch."""
+        with self._lock:
+            return predict_padded(self._run, batch, self.batch_sizes)
+
+
+# ONNX Runtime backend
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_path, num_threads=INFERENCE_THREADS):
+        """
+        Run an .onnx model with ONNX Runtime on the CPU.
+
+        Weights stored as external data (convert_model.py --onnx-external-data)
+        are memory-mapped rather than copied, so processes loading the same
+        file share them.
+
+        Args:
+            model_path: Path to an .onnx model file
+            num_threads: Intra-op threads (0 lets ONNX Runtime decide)
+        """
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_shape = tuple(model_input.shape[1:])
+
+    def predict(self, batch):
+        """Return class probabilities for an (N, 224, 224, 3) float32 batch."""
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+BACKENDS = {
+    "keras": KerasBackend,
+    "tflite": TFLiteBackend,
+    "onnx": OnnxBackend
+}
+
+def backend_for_path(model_path):
+    """Guess the backend from the model file extension."""
+    extension = os.path.splitext(model_path)[1].lower()
+    return {".tflite": "tflite", ".onnx": "onnx"}.get(extension, "keras")
+
+def load_backend(model_path, backend=INFERENCE_BACKEND):
+    """
+    Load a model with the configured inference backend.
+
+    Args:
+        model_path: Path to the model file
+        backend: Backend name (keras, tflite or onnx); empty guesses from the extension
+
+    Returns:
+        Backend instance with a predict(batch) method
+    """
+    backend = backend or backend_for_path(model_path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[backend](model_path)
@@ -0,0 +1,176 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+# -----------------------------
+# Scheduler settings
+# -----------------------------
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+
+# Dynamic micro-batching in front of a local model
+class MicroBatchScheduler:
+    def __init__(self, predict_fn, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait_ms=INFERENCE_MAX_WAIT_MS):
+        """
+        Collect concurrent single-image requests and run them as one batch.
+
+        A batch is flushed as soon as it holds max_batch_size images or the
+        oldest queued image has waited max_wait_ms, whichever comes first.
+        One long-lived worker thread owns all calls to predict_fn; jobs whose
+        deadline has passed by the time they are batched are dropped instead
+        of being run for a caller that has stopped waiting.
+
+        Args:
+            predict_fn: Function taking an (N, H, W, C) array and returning N prediction rows
+            max_batch_size: Largest batch sent to predict_fn
+            max_wait_ms: Longest time the first image of a batch waits for company
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # Statistics
+        self.request_count = 0
+        self.batch_count = 0
+        self.batch_size_histogram = {}
+        self.in_flight = 0
+        self.timeout_count = 0
+        self.expired_count = 0
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use (and again in forked children)."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            if self._worker_pid != os.getpid():
+                # Threads don't survive fork; anything queued in the parent is lost
+                self._queue = queue.Queue()
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="micro-batch-scheduler", daemon=True)
+            self._worker.start()
+
+    def submit(self, image, deadline=None):
+        """
+        Queue one preprocessed image for inference.
+
+        Args:
+            image: Model input for a single image, without the batch dimension
+            deadline: Optional time.monotonic() value after which the job is
+                dropped rather than run
+
+        Returns:
+            concurrent.futures.Future resolving to this image's prediction row
+            (or failing with TimeoutError if it expired in the queue)
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((image, future, deadline))
+        return future
+
+    def predict(self, image, timeout=None):
+        """
+        Submit one image and wait for its prediction row.
+
+        Args:
+            image: Model input for a single image
+            timeout: Seconds to wait; the job is also dropped from the queue
+                if the worker hasn't started it by then
+
+        Raises:
+            TimeoutError: If no prediction arrived within timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        future = self.submit(image, deadline)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.done():
+                raise  # Expired in the queue; the worker already counted it
+            # Still queued: cancelling keeps the worker from running it later
+            future.cancel()
+            with self._lock:
+                self.timeout_count += 1
+            raise TimeoutError(f"No prediction within {timeout:.1f}s") from None
+
+    def _collect_batch(self):
+        """Block for the first job, then gather more until the batch is full or the deadline passes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            jobs = self._collect_batch()
+
+            # Skip jobs whose callers already gave up or whose deadline has passed
+            now = time.monotonic()
+            batch = []
+            expired = 0
+            for image, future, deadline in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if deadline is not None and now >= deadline:
+                    future.set_exception(TimeoutError("Inference deadline passed before the job started"))
+                    expired += 1
+                    continue
+                batch.append((image, future))
+
+            with self._lock:
+                self.expired_count += expired
+                if not batch:
+                    continue
+                self.request_count += len(batch)
+                self.batch_count += 1
+                self.batch_size_histogram[len(batch)] = self.batch_size_histogram.get(len(batch), 0) + 1
+                self.in_flight = len(batch)
+
+            try:
+                predictions = self.predict_fn(np.stack([image for image, _ in batch]))
+                for (_, future), row in zip(batch, predictions):
+                    future.set_result(row)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.in_flight = 0
+
+    def get_statistics(self):
+        """
+        Get statistics about scheduled inference.
+
+        Returns:
+            Dictionary with backlog, in-flight count, timeouts and batch-size histogram
+        """
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'backlog': self._queue.qsize(),
+                'in_flight': self.in_flight,
+                'timeouts': self.timeout_count,
+                'expired': self.expired_count,
+                'requests': self.request_count,
+                'batches': self.batch_count,
+                'average_batch_size': self.request_count / self.batch_count if self.batch_count else 0.0,
+                'batch_size_histogram': dict(sorted(self.batch_size_histogram.items()))
+            }
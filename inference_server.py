@@ -0,0 +1,359 @@
+import os
+import sys
+import time
+import queue
+import socket
+import struct
+import atexit
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from preprocessing import MODEL_INPUT_SIZE, prepare_canvas, to_model_input
+
+# -----------------------------
+# Server settings
+# -----------------------------
+# When set, the web apps send images to the inference server on this Unix socket
+# instead of loading the model themselves
+INFERENCE_SERVER_SOCKET = os.getenv("INFERENCE_SERVER_SOCKET", "")
+INFERENCE_SERVER_PROCESSES = int(os.getenv("INFERENCE_SERVER_PROCESSES", "1"))
+INFERENCE_SERVER_SLOTS = int(os.getenv("INFERENCE_SERVER_SLOTS", "16"))  # Frames in flight per client process
+
+# Wire format (network byte order). Pixels never cross the socket, only slot numbers.
+_HELLO = struct.Struct("!HIHH")      # shared memory name length, slot count, slot height, slot width
+_REQUEST = struct.Struct("!QII")     # request id, slot, timeout in ms (0 = none)
+_RESPONSE = struct.Struct("!QBI")    # request id, status, payload length
+_STATUS_OK, _STATUS_ERROR, _STATUS_TIMEOUT = 0, 1, 2
+
+
+def _recv_exact(sock, size):
+    """Read exactly size bytes, or return None if the peer closed the connection."""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+# -----------------------------
+# Server side
+# -----------------------------
+def _attach_shared_memory(name):
+    """Open a client's segment without letting this process's resource tracker unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class _Connection:
+    def __init__(self, sock, engine):
+        """Serve one client process: read slot numbers, answer with class probabilities."""
+        self.sock = sock
+        self.engine = engine
+        self.send_lock = threading.Lock()
+        self.shm = None
+
+    def serve(self):
+        frames = None
+        try:
+            hello = _recv_exact(self.sock, _HELLO.size)
+            if hello is None:
+                return
+            name_length, slots, height, width = _HELLO.unpack(hello)
+            name = _recv_exact(self.sock, name_length).decode()
+            self.shm = _attach_shared_memory(name)
+            frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=self.shm.buf)
+
+            while True:
+                header = _recv_exact(self.sock, _REQUEST.size)
+                if header is None:
+                    return
+                request_id, slot, timeout_ms = _REQUEST.unpack(header)
+                deadline = time.monotonic() + timeout_ms / 1000.0 if timeout_ms else None
+                # Convert to float now: the client may reuse the slot once it has its answer
+                future = self.engine.scheduler.submit(to_model_input(frames[slot]), deadline)
+                future.add_done_callback(lambda done, request_id=request_id: self._respond(request_id, done))
+        except OSError:
+            return
+        finally:
+            frames = None
+            if self.shm is not None:
+                self.shm.close()
+            self.sock.close()
+
+    def _respond(self, request_id, future):
+        try:
+            payload = np.asarray(future.result(), dtype=np.float32).tobytes()
+            status = _STATUS_OK
+        except TimeoutError as e:
+            payload, status = str(e).encode(), _STATUS_TIMEOUT
+        except Exception as e:
+            payload, status = str(e).encode(), _STATUS_ERROR
+        try:
+            with self.send_lock:
+                self.sock.sendall(_RESPONSE.pack(request_id, status, len(payload)) + payload)
+        except OSError:
+            pass  # Client went away; its reader thread fails the pending requests
+
+
+def _serve_forever(listener):
+    """Load the model in this process, then handle client connections on threads."""
+    from inference import load_engine, set_engine
+    # Always a local model here, even if INFERENCE_SERVER_SOCKET is set in the shared environment
+    engine = load_engine()
+    set_engine(engine)
+    if engine is None:
+        print("❌ Inference server has no model to serve (check MODEL_PATH)")
+        sys.exit(1)
+    print(f"✅ Inference process {os.getpid()} ready ({engine.name} backend)")
+    while True:
+        sock, _ = listener.accept()
+        threading.Thread(target=_Connection(sock, engine).serve, daemon=True).start()
+
+def serve(socket_path=INFERENCE_SERVER_SOCKET, processes=INFERENCE_SERVER_PROCESSES):
+    """
+    Run the inference server.
+
+    The parent binds the Unix socket and forks the inference processes,
+    which each load the model and accept connections from the shared
+    listening socket, so the kernel spreads clients across them.
+
+    Args:
+        socket_path: Filesystem path of the Unix socket
+        processes: Number of inference processes (each with its own model)
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+    print(f"ℹ️ Inference server listening on {socket_path} with {processes} process(es)")
+
+    # Fork before any model runtime is loaded; each child loads its own
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_serve_forever, args=(listener,), daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# -----------------------------
+# Client side
+# -----------------------------
+class _Channel:
+    def __init__(self, socket_path, slots, target_size):
+        """One client process's connection: a socket plus its shared memory ring of frame slots."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * target_size[0] * target_size[1] * 3)
+        self.frames = np.ndarray((slots,) + tuple(target_size) + (3,), dtype=np.uint8, buffer=self.shm.buf)
+        self.free_slots = queue.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        self.pending = {}
+        self.alive = True
+        # Requests are sent from many threads; sendall on a stream socket isn't atomic
+        self.send_lock = threading.Lock()
+        name = self.shm.name.encode()
+        self.sock.sendall(_HELLO.pack(len(name), slots, target_size[0], target_size[1]) + name)
+
+    def close(self):
+        """Close the socket and remove the shared memory segment (safe to call twice)."""
+        self.alive = False
+        self.sock.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class InferenceClient:
+    name = "remote"
+
+    def __init__(self, socket_path=INFERENCE_SERVER_SOCKET, slots=INFERENCE_SERVER_SLOTS, target_size=MODEL_INPUT_SIZE):
+        """
+        Send images to an inference server through shared memory.
+
+        Each client process owns a shared memory ring of uint8 frame slots.
+        Images are letterboxed and lighting-normalized straight into a free
+        slot, and only the slot number travels over the socket. A slot is
+        returned to the ring when its answer arrives. Has the same
+        predict_image / predict_images interface as InferenceEngine.
+
+        Args:
+            socket_path: Unix socket of the inference server
+            slots: Number of frames that can be in flight at once
+            target_size: (height, width) of the model input
+        """
+        self.socket_path = socket_path
+        self.slot_count = slots
+        self.target_size = target_size
+        self._lock = threading.Lock()
+        self._channel = None
+        self._pid = None
+        self._next_id = 0
+
+        # Statistics
+        self.request_count = 0
+        self.error_count = 0
+        self.connect_count = 0
+
+        atexit.register(self.close)
+
+    def close(self):
+        """Close this process's connection, if any (registered with atexit once per client)."""
+        with self._lock:
+            channel = self._channel
+            # A forked child must not remove its parent's shared memory
+            if channel is None or self._pid != os.getpid():
+                return
+            self._channel = None
+        channel.close()
+
+    def _get_channel(self):
+        """Connect on first use, after a lost connection, and again in forked children."""
+        with self._lock:
+            channel = self._channel
+            if channel is not None and channel.alive and self._pid == os.getpid():
+                return channel
+            try:
+                channel = _Channel(self.socket_path, self.slot_count, self.target_size)
+            except OSError as e:
+                self.error_count += 1
+                raise ConnectionError(f"Inference server unavailable at {self.socket_path}: {e}") from None
+            self._channel, self._pid = channel, os.getpid()
+            self.connect_count += 1
+        threading.Thread(target=self._read_responses, args=(channel,), daemon=True).start()
+        return channel
+
+    def _read_responses(self, channel):
+        try:
+            while True:
+                header = _recv_exact(channel.sock, _RESPONSE.size)
+                if header is None:
+                    break
+                request_id, status, length = _RESPONSE.unpack(header)
+                payload = _recv_exact(channel.sock, length) if length else b""
+                if payload is None:
+                    break
+                with self._lock:
+                    future, slot = channel.pending.pop(request_id, (None, None))
+                if future is None:
+                    continue
+                channel.free_slots.put(slot)
+                if status == _STATUS_OK:
+                    future.set_result(np.frombuffer(payload, dtype=np.float32))
+                elif status == _STATUS_TIMEOUT:
+                    future.set_exception(TimeoutError(payload.decode()))
+                else:
+                    future.set_exception(RuntimeError(payload.decode()))
+        except OSError:
+            pass
+        # Connection lost: fail whatever is still waiting; the next call reconnects
+        with self._lock:
+            channel.alive = False
+            pending, channel.pending = channel.pending, {}
+            self.error_count += len(pending)
+        for future, _ in pending.values():
+            future.set_exception(ConnectionError("Inference server connection lost"))
+        channel.close()
+
+    def submit_image(self, img, bgr=False, timeout=None, deadline=None):
+        """
+        Write one image into a free slot and send it to the server.
+
+        Args:
+            img: uint8 image as a numpy array
+            bgr: Whether the image is in BGR order
+            timeout: Optional seconds, from now, for waiting for a slot and for
+                the server to run the job
+            deadline: time.monotonic() by which the job must be done (instead of timeout)
+
+        Returns:
+            Future resolving to the image's class probability row
+        """
+        if deadline is None and timeout:
+            deadline = time.monotonic() + timeout
+        channel = self._get_channel()
+        try:
+            slot = channel.free_slots.get(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+        except queue.Empty:
+            raise TimeoutError("No free inference slot") from None
+        prepare_canvas(img, self.target_size, bgr=bgr, out=channel.frames[slot])
+        # The server gets what is left after waiting for the slot (at least 1 ms, as 0 means no timeout)
+        timeout_ms = max(1, int((deadline - time.monotonic()) * 1000)) if deadline else 0
+        future = Future()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            channel.pending[request_id] = (future, slot)
+            self.request_count += 1
+        try:
+            with channel.send_lock:
+                channel.sock.sendall(_REQUEST.pack(request_id, slot, timeout_ms))
+        except OSError as e:
+            with self._lock:
+                channel.pending.pop(request_id, None)
+                self.error_count += 1
+            raise ConnectionError(f"Inference server unavailable: {e}") from None
+        return future
+
+    def predict_image(self, img, bgr=False, timeout=None):
+        """Classify one raw image on the server and return its class probability row."""
+        # One deadline covers waiting for a slot and waiting for the answer
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            future = self.submit_image(img, bgr=bgr, deadline=deadline)
+            return future.result(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No prediction within {timeout:.1f}s") from None
+
+    def predict_images(self, images):
+        """Classify a list of raw RGB images; the server batches them together."""
+        futures = [self.submit_image(img) for img in images]
+        return np.stack([future.result() for future in futures])
+
+    def get_statistics(self):
+        with self._lock:
+            channel = self._channel
+            return {
+                "backend": self.name,
+                "socket": self.socket_path,
+                "slots": self.slot_count,
+                "free_slots": channel.free_slots.qsize() if channel is not None else self.slot_count,
+                "in_flight": len(channel.pending) if channel is not None else 0,
+                "requests": self.request_count,
+                "errors": self.error_count,
+                "connects": self.connect_count
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local inference server for the waste classifier")
+    parser.add_argument("--socket", default=INFERENCE_SERVER_SOCKET or "/tmp/waste-inference.sock",
+                        help="Unix socket path (clients use INFERENCE_SERVER_SOCKET)")
+    parser.add_argument("--processes", type=int, default=INFERENCE_SERVER_PROCESSES,
+                        help="Inference processes, each with its own model")
+    args = parser.parse_args()
+    serve(args.socket, args.processes)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import os
+import json
+import math
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+# -----------------------------
+# Mosaic settings
+# -----------------------------
+AI_MOSAIC_MAX_TILES = int(os.getenv("AI_MOSAIC_MAX_TILES", "9"))  # Images per grid (K)
+AI_MOSAIC_TILE_SIZE = int(os.getenv("AI_MOSAIC_TILE_SIZE", "320"))  # Pixels per tile side
+
+# Categories the provider prompts ask for
+WASTE_CATEGORIES = ["Organic", "Recyclable", "Hazardous", "Non-recyclable"]
+
+_GAP = 8  # White border between tiles
+_LABEL_HEIGHT_RATIO = 0.14
+
+
+def _label_font(size):
+    try:
+        return ImageFont.load_default(size=size)  # Pillow 10.1+
+    except TypeError:
+        return ImageFont.load_default()
+
+
+# -----------------------------
+# Grid building
+# -----------------------------
+def build_mosaic(images, tile_size=AI_MOSAIC_TILE_SIZE):
+    """
+    Tile images into one numbered grid.
+
+    Each image is letterboxed into a square tile (aspect ratio kept, gray
+    padding), and tiles are numbered 1..N left to right, top to bottom,
+    with the number drawn in a black box in the tile's top-left corner.
+
+    Args:
+        images: List of PIL Images
+        tile_size: Side of each square tile in pixels
+
+    Returns:
+        RGB PIL Image of the grid
+    """
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    grid = Image.new("RGB", (columns * tile_size + (columns + 1) * _GAP, rows * tile_size + (rows + 1) * _GAP), "white")
+    draw = ImageDraw.Draw(grid)
+    label_height = max(12, int(tile_size * _LABEL_HEIGHT_RATIO))
+    font = _label_font(int(label_height * 0.8))
+
+    for index, image in enumerate(images):
+        row, column = divmod(index, columns)
+        left = _GAP + column * (tile_size + _GAP)
+        top = _GAP + row * (tile_size + _GAP)
+        tile = ImageOps.pad(ImageOps.exif_transpose(image).convert("RGB"), (tile_size, tile_size),
+                            method=Image.BILINEAR, color=(128, 128, 128))
+        grid.paste(tile, (left, top))
+
+        label = str(index + 1)
+        text_box = draw.textbbox((0, 0), label, font=font)
+        box_width = text_box[2] - text_box[0] + label_height // 2
+        draw.rectangle((left, top, left + box_width, top + label_height), fill="black")
+        draw.text((left + label_height // 4 - text_box[0], top + (label_height - (text_box[3] - text_box[1])) // 2 - text_box[1]),
+                  label, fill="white", font=font)
+    return grid
+
+def mosaic_prompt(count):
+    """Prompt asking for one classification per numbered tile."""
+    return f"""
+        This image is a grid of {count} numbered tiles (1 to {count}, left to right,
+        top to bottom). Each tile shows one waste item. Classify the item in every
+        tile into one of these categories:
+        - Organic: Food waste, plant materials, compostable items
+        - Recyclable: Paper, cardboard, glass, certain plastics, metals
+        - Hazardous: Batteries, chemicals, electronic waste, medical waste
+        - Non-recyclable: Mixed materials, certain plastics, contaminated items
+
+        Respond with only a JSON array of exactly {count} objects, one per tile:
+        [{{"tile": 1, "category": "[category name]", "confidence": [0-100], "reasoning": "[brief explanation]"}}, ...]
+        """
+
+
+# -----------------------------
+# Response validation
+# -----------------------------
+def parse_mosaic_response(text, count, source):
+    """
+    Map a provider's JSON array answer back to the tiles.
+
+    Entries are only accepted if they name a tile between 1 and count (once),
+    a known category and a numeric confidence between 0 and 100.
+
+    Args:
+        text: Raw response text
+        count: Number of tiles in the grid
+        source: Provider name for the results
+
+    Returns:
+        List with one result dict (or None where the tile has no valid
+        answer) per tile, in tile order
+    """
+    results = [None] * count
+    try:
+        entries = json.loads(text[text.find('['):text.rfind(']') + 1])
+    except (ValueError, TypeError):
+        return results
+    if not isinstance(entries, list):
+        return results
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            tile = int(entry.get("tile"))
+            confidence = float(entry.get("confidence"))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= tile <= count or results[tile - 1] is not None:
+            continue
+        if entry.get("category") not in WASTE_CATEGORIES or not 0 <= confidence <= 100:
+            continue
+        results[tile - 1] = {
+            "source": source,
+            "class_name": entry["category"],
+            "confidence": confidence / 100,
+            "reasoning": str(entry.get("reasoning", "")),
+            "mosaic_tile": tile
+        }
+    return results
@@ -0,0 +1,315 @@
+import os
+import json
+import asyncio
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+# -----------------------------
+# Cache settings
+# -----------------------------
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "2048"))
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+
+# Near-duplicate (perceptual hash) cache for continuous webcam frames
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "5"))
+PHASH_HISTORY = int(os.getenv("PHASH_HISTORY", "4"))
+PHASH_CACHE_TTL = float(os.getenv("PHASH_CACHE_TTL", "30"))
+PHASH_MAX_SESSIONS = int(os.getenv("PHASH_MAX_SESSIONS", "1024"))
+
+
+# -----------------------------
+# Content hashing
+# -----------------------------
+def hash_bytes(data):
+    """Hash raw (encoded) image bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def hash_pixels(image):
+    """
+    Hash decoded pixels so re-encoded copies of the same image share a key.
+
+    Args:
+        image: PIL Image or numpy array
+
+    Returns:
+        Hex digest of the pixel data, shape and dtype
+    """
+    if isinstance(image, Image.Image):
+        image = np.asarray(image)
+    image = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.shape}{image.dtype}".encode())
+    digest.update(memoryview(image).cast("B"))
+    return digest.hexdigest()
+
+def dhash(image, hash_size=8):
+    """
+    Compute a difference hash: one bit per horizontally adjacent pixel pair.
+
+    Args:
+        image: PIL Image or numpy array (RGB)
+        hash_size: Hash is hash_size * hash_size bits
+
+    Returns:
+        Perceptual hash as an int
+    """
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    small = np.asarray(image.resize((hash_size + 1, hash_size), Image.BOX).convert("L"), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming_distance(a, b):
+    """Number of differing bits between two perceptual hashes."""
+    return bin(a ^ b).count("1")
+
+
+# LRU + TTL cache for prediction results
+class PredictionCache:
+    def __init__(self, max_entries=PREDICTION_CACHE_MAX_ENTRIES, max_bytes=PREDICTION_CACHE_MAX_BYTES, ttl=PREDICTION_CACHE_TTL):
+        """
+        Initialize the prediction cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Approximate memory limit for cached results
+            ttl: Seconds a cached result stays valid
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _copy(value):
+        return dict(value) if isinstance(value, dict) else value
+
+    @staticmethod
+    def _estimate_size(key, value):
+        """Approximate memory used by an entry (results are small JSON-like values)."""
+        return len(key) + len(json.dumps(value, default=str)) + 64
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._copy(entry[2])
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries to stay within limits."""
+        size = self._estimate_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, self._copy(value))
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_statistics(self):
+        """
+        Get statistics about cache usage.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+# Coalescing of identical in-flight async calls
+class SingleFlight:
+    def __init__(self):
+        """
+        Share one in-flight call between concurrent callers with the same key.
+
+        The first caller for a key starts the call as a task; callers that
+        arrive while it is running await the same task instead of issuing
+        their own. A caller that is cancelled (e.g. by its timeout) only
+        cancels the shared call if nobody else is still waiting on it.
+        Calls are grouped per event loop, since a task can only be awaited
+        from the loop that runs it.
+        """
+        self._calls = {}  # (loop, key) -> [task, waiter count]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key, call):
+        """
+        Await call() once per key across concurrent callers.
+
+        Args:
+            key: Identifies equivalent calls (e.g. provider name + image hash)
+            call: Zero-argument function returning a coroutine
+
+        Returns:
+            The call's result (shared by every caller that joined it)
+        """
+        slot = (asyncio.get_running_loop(), key)
+        with self._lock:
+            entry = self._calls.get(slot)
+            if entry is None:
+                entry = [asyncio.ensure_future(call()), 0]
+                self._calls[slot] = entry
+                entry[0].add_done_callback(lambda _, entry=entry: self._finish(slot, entry))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+            entry[1] += 1
+        task = entry[0]
+        try:
+            # Shielded so one waiter's cancellation doesn't fail the others
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                abandoned = entry[1] == 0 and not task.done()
+            if abandoned:
+                task.cancel()
+
+    def _finish(self, slot, entry):
+        with self._lock:
+            if self._calls.get(slot) is entry:
+                del self._calls[slot]
+
+    def get_statistics(self):
+        with self._lock:
+            total = self.calls + self.coalesced
+            return {
+                'in_flight': len(self._calls),
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'coalesced_rate': self.coalesced / total if total else 0.0
+            }
+
+
+# Per-session cache of recent frames, matched by perceptual hash
+class NearDuplicateCache:
+    def __init__(self, max_distance=PHASH_MAX_DISTANCE, history=PHASH_HISTORY, ttl=PHASH_CACHE_TTL, max_sessions=PHASH_MAX_SESSIONS):
+        """
+        Initialize the near-duplicate cache.
+
+        Consecutive webcam frames of a static scene are never byte-identical,
+        so frames are compared by dHash within a Hamming-distance threshold.
+
+        Args:
+            max_distance: Largest Hamming distance treated as the same scene
+            history: Number of recent frames remembered per session
+            ttl: Seconds a remembered classification stays valid
+            max_sessions: Sessions kept before the least recently active is evicted
+        """
+        self.max_distance = max_distance
+        self.history = history
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> [(hash, expires_at, result), ...]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted_sessions = 0
+
+    def lookup(self, session_id, image):
+        """
+        Find a recent classification for a near-identical frame.
+
+        Args:
+            session_id: Stream/session the frame belongs to
+            image: PIL Image or numpy array
+
+        Returns:
+            Tuple (cached result or None, frame hash to pass to store())
+        """
+        frame_hash = dhash(image)
+        now = time.monotonic()
+        with self._lock:
+            frames = self._sessions.get(session_id)
+            if frames is not None:
+                self._sessions.move_to_end(session_id)
+                frames[:] = [frame for frame in frames if frame[1] >= now]
+                best = min(frames, key=lambda frame: hamming_distance(frame[0], frame_hash), default=None)
+                if best is not None and hamming_distance(best[0], frame_hash) <= self.max_distance:
+                    self.hits += 1
+                    return PredictionCache._copy(best[2]), frame_hash
+            self.misses += 1
+            return None, frame_hash
+
+    def store(self, session_id, frame_hash, result):
+        """Remember the classification of a frame for this session."""
+        with self._lock:
+            frames = self._sessions.setdefault(session_id, [])
+            self._sessions.move_to_end(session_id)
+            frames.append((frame_hash, time.monotonic() + self.ttl, PredictionCache._copy(result)))
+            del frames[:-self.history]
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted_sessions += 1
+
+    def drop(self, session_id):
+        """Forget a session (e.g. when its client disconnects)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_statistics(self):
+        """
+        Get statistics about near-duplicate lookups.
+
+        Returns:
+            Dictionary with hit/miss counters and the number of tracked sessions
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'sessions': len(self._sessions),
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evicted_sessions': self.evicted_sessions
+            }
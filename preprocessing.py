@@ -0,0 +1,189 @@
+import threading
+
+import cv2
+import numpy as np
+
+# -----------------------------
+# Model input settings
+# -----------------------------
+MODEL_INPUT_SIZE = (224, 224)  # (height, width)
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+
+# CLAHE objects and scratch buffers are not thread-safe, so each thread keeps its own
+_local = threading.local()
+
+
+def _thread_buffer(name, shape, dtype=np.uint8):
+    """Return a scratch array owned by the calling thread, allocating it on first use."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    key = (name, tuple(shape), np.dtype(dtype).str)
+    buffer = buffers.get(key)
+    if buffer is None:
+        buffer = buffers[key] = np.empty(shape, dtype=dtype)
+    return buffer
+
+def get_clahe():
+    """Return the calling thread's reusable CLAHE instance."""
+    clahe = getattr(_local, "clahe", None)
+    if clahe is None:
+        clahe = _local.clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID)
+    return clahe
+
+def _to_three_channels(img):
+    """Drop alpha / expand grayscale so every entry point works on 3-channel uint8."""
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_RGBA2RGB)
+    return img
+
+
+# -----------------------------
+# Pipeline stages
+# -----------------------------
+def resize_with_padding(img, target_size=MODEL_INPUT_SIZE, out=None):
+    """
+    Resize while keeping aspect ratio and pad with black borders.
+
+    Args:
+        img: Image as a numpy array (H, W, C)
+        target_size: (height, width) of the padded output
+        out: Optional (height, width, C) array to letterbox into in place
+
+    Returns:
+        The letterboxed image (out, if given)
+    """
+    h, w = img.shape[:2]
+    scale = min(target_size[0] / h, target_size[1] / w)
+    nh, nw = max(1, int(h * scale)), max(1, int(w * scale))
+    top = (target_size[0] - nh) // 2
+    left = (target_size[1] - nw) // 2
+
+    if out is None:
+        out = np.zeros((target_size[0], target_size[1]) + img.shape[2:], dtype=img.dtype)
+    else:
+        # Only the borders need clearing; the resized image covers the rest
+        out[:top] = 0
+        out[top + nh:] = 0
+        out[top:top + nh, :left] = 0
+        out[top:top + nh, left + nw:] = 0
+
+    region = out[top:top + nh, left:left + nw]
+    resized = cv2.resize(img, (nw, nh), dst=region)
+    if not np.shares_memory(resized, region):
+        region[...] = resized
+    return out
+
+def normalize_lighting(image, bgr=False, out=None):
+    """
+    Normalize lighting conditions with CLAHE on the L channel of LAB.
+
+    Args:
+        image: uint8 image as a numpy array (H, W, 3)
+        bgr: Whether the input is in BGR order (the output is always RGB)
+        out: Optional array to write the result into (may be image itself)
+
+    Returns:
+        Normalized RGB image
+    """
+    h, w = image.shape[:2]
+    lab = _thread_buffer("lab", (h, w, 3))
+    lightness = _thread_buffer("lightness", (h, w))
+
+    cv2.cvtColor(image, cv2.COLOR_BGR2LAB if bgr else cv2.COLOR_RGB2LAB, dst=lab)
+    cv2.extractChannel(lab, 0, dst=lightness)
+    get_clahe().apply(lightness, dst=lightness)
+    cv2.insertChannel(lightness, lab, 0)
+
+    if out is None:
+        out = np.empty_like(image)
+    return cv2.cvtColor(lab, cv2.COLOR_LAB2RGB, dst=out)
+
+def to_model_input(image, out=None):
+    """
+    Scale uint8 pixels to MobileNetV2's [-1, 1] range (same as its preprocess_input).
+
+    Args:
+        image: uint8 image as a numpy array
+        out: Optional float32 array of the same shape to write into
+
+    Returns:
+        float32 array
+    """
+    if out is None:
+        out = np.empty(image.shape, dtype=np.float32)
+    np.multiply(image, 1.0 / 127.5, out=out, dtype=np.float32, casting="unsafe")
+    np.subtract(out, 1.0, out=out)
+    return out
+
+
+# -----------------------------
+# Full pipeline
+# -----------------------------
+def prepare_canvas(img, target_size=MODEL_INPUT_SIZE, bgr=False, out=None):
+    """
+    Letterbox and normalize lighting, stopping before the float conversion.
+
+    The uint8 result is a quarter of the size of the model input, which
+    makes it the cheaper form to hand to another process.
+
+    Args:
+        img: uint8 image as a numpy array (grayscale, RGB/BGR or RGBA)
+        target_size: (height, width) of the model input
+        bgr: Whether the input is in BGR order
+        out: Optional uint8 (height, width, 3) array to write into; a
+            per-thread buffer is used otherwise
+
+    Returns:
+        uint8 RGB array of shape (height, width, 3)
+    """
+    if out is None:
+        out = _thread_buffer("canvas", (target_size[0], target_size[1], 3))
+    resize_with_padding(_to_three_channels(img), target_size, out=out)
+    return normalize_lighting(out, bgr=bgr, out=out)
+
+def preprocess_image(img, target_size=MODEL_INPUT_SIZE, bgr=False, out=None):
+    """
+    Letterbox, normalize lighting and scale one image for the model.
+
+    Every stage writes into per-thread buffers, so no arrays are allocated
+    after the first call on a thread. When out is not given, the returned
+    array is one of those buffers and is overwritten by the thread's next
+    call; copy it if it needs to outlive that.
+
+    Args:
+        img: uint8 image as a numpy array (grayscale, RGB/BGR or RGBA)
+        target_size: (height, width) of the model input
+        bgr: Whether the input is in BGR order (e.g. OpenCV camera frames)
+        out: Optional float32 (height, width, 3) array to write into
+
+    Returns:
+        float32 array of shape (height, width, 3) in [-1, 1]
+    """
+    canvas = prepare_canvas(img, target_size, bgr=bgr)
+
+    if out is None:
+        out = _thread_buffer("model_input", canvas.shape, np.float32)
+    return to_model_input(canvas, out=out)
+
+def preprocess_batch(images, target_size=MODEL_INPUT_SIZE, bgr=False, out=None):
+    """
+    Preprocess several images straight into one batched model input tensor.
+
+    Args:
+        images: List of uint8 images as numpy arrays
+        target_size: (height, width) of the model input
+        bgr: Whether the inputs are in BGR order
+        out: Optional float32 (N, height, width, 3) array to fill
+
+    Returns:
+        float32 array of shape (N, height, width, 3)
+    """
+    if out is None:
+        out = np.empty((len(images), target_size[0], target_size[1], 3), dtype=np.float32)
+    for i, img in enumerate(images):
+        preprocess_image(img, target_size, bgr=bgr, out=out[i])
+    return out
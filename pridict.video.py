@@ -1,56 +1,26 @@
-import tensorflow as tf
-from tensorflow.keras.models import load_model
 import numpy as np
 import cv2
-from collections import deque
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 from PIL import Image, ImageTk
-from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
 import socket
 import netifaces
 import threading
 import time
 import re
-import requests
 from io import BytesIO
-
-# -----------------------------
-# Load trained model
-# -----------------------------
-MODEL_PATH = r"/Users/surajpadhan/Desktop/mode code web/best_mobilenetv2_model.keras"
-
-try:
-    model = load_model(MODEL_PATH)
-    print("✅ Model loaded successfully!")
-except Exception as e:
-    print("❌ Error loading model:", e)
-    exit()
+from inference import get_engine
+from provider_clients import clients
+from smoothing import SmoothingStore
 
 # Classes
 CLASSES = ["O", "R", "H"]
 CLASS_NAMES = {"R": "Organic", "O": "Hazardous", "H": "Recycle"}
 CONFIDENCE_THRESHOLD = 0.7
-pred_buffer = deque(maxlen=10)
-
+PREDICTION_TIMEOUT = 2.0  # Seconds to wait for the model before skipping a frame
+# Temporal smoothing over the last 10 predictions of each camera stream
+smoothing = SmoothingStore(window=10)
 
-# -----------------------------
-# Utility functions
-# -----------------------------
-def resize_with_padding(img, target_size=(224, 224)):
-    """Resize while keeping aspect ratio and pad with black borders."""
-    h, w = img.shape[:2]
-    scale = min(target_size[0] / h, target_size[1] / w)
-    nh, nw = int(h * scale), int(w * scale)
-    img_resized = cv2.resize(img, (nw, nh))
-    top = (target_size[0] - nh) // 2
-    bottom = target_size[0] - nh - top
-    left = (target_size[1] - nw) // 2
-    right = target_size[1] - nw - left
-    img_padded = cv2.copyMakeBorder(
-        img_resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=[0, 0, 0]
-    )
-    return img_padded
 
 # -----------------------------
 # Network and IP Camera Functions
@@ -115,7 +85,7 @@ def scan_network_for_ip_cameras(base_ip, callback=None):
             
             for url in urls_to_try:
                 try:
-                    response = requests.get(url, timeout=0.5)
+                    response = clients.http_session().get(url, timeout=0.5)
                     if response.status_code == 200:
                         discovered_cameras.append(url)
                         if callback:
@@ -151,131 +121,88 @@ def scan_network_for_ip_cameras(base_ip, callback=None):
     return discovered_cameras
 
 
-def predict_frame(frame, return_confidence=False):
+def predict_frame(frame, return_confidence=False, stream_id="camera"):
     """Run prediction on a frame and return label string.
     Args:
         frame: The image frame to analyze
         return_confidence: If True, returns (label, confidence) tuple instead of just label string
+        stream_id: Camera/session whose recent predictions are used for smoothing
     """
     if frame is None:
         return ("❌ No valid frame to analyze", 0.0) if return_confidence else "❌ No valid frame to analyze"
         
     try:
-        # First try using external AI APIs if available
+        # Enhanced validation for frame format
+        if not isinstance(frame, np.ndarray) or frame.size == 0 or len(frame.shape) < 2:
+            return ("❌ Invalid frame format", 0.0) if return_confidence else "❌ Invalid frame format"
+            
+        # Enhanced image preprocessing pipeline (shared with the web apps):
+        # resize with padding, CLAHE lighting normalization, MobileNetV2 scaling.
+        # 3-channel camera frames are BGR.
+        is_bgr = len(frame.shape) == 3 and frame.shape[2] == 3
+
+        # The model runs once per frame; its answer feeds both the smoothing
+        # window and classify_waste's cascade
+        predictions = None
+        local_error = "❌ Model error"
+        engine = get_engine()
+        if engine is not None:
+            # The engine's single inference thread runs the model; a frame that
+            # isn't picked up within the timeout is dropped, not run late
+            try:
+                predictions = engine.predict_image(frame, bgr=is_bgr, timeout=PREDICTION_TIMEOUT)
+            except TimeoutError:
+                print("Model prediction timed out")
+                local_error = "❌ Model timeout"
+            except Exception as model_error:
+                print(f"Model prediction error: {model_error}")
+
+        # Ask the external AI APIs unless the local model is confident on its own
         try:
-            from ai_integration import classify_waste
+            from ai_integration import cascade_answers_locally, classify_waste
+            from inference import local_result
             
-            # Try to get prediction from external AI with ensemble method
-            external_prediction = classify_waste(frame, use_ensemble=True, confidence_threshold=0.65)
+            local = local_result(predictions) if predictions is not None else None
+            if local is None and engine is not None:
+                # The model failed or timed out: pass that on (as predict_local_model would) rather than rerun it
+                local = {"source": "local", "error": local_error, "class_name": "Error", "confidence": 0}
             
-            if external_prediction:
-                # If we got a valid prediction from external AI, return it
-                result = f"🌐 {external_prediction} (AI Ensemble)"
-                return (result, 95.0) if return_confidence else result
+            if not cascade_answers_locally(local):
+                # Try to get prediction from external AI with ensemble method
+                external_prediction = classify_waste(frame, use_ensemble=True, confidence_threshold=0.65, local_result=local)
+                
+                if external_prediction:
+                    # If we got a valid prediction from external AI, return it
+                    result = f"🌐 {external_prediction} (AI Ensemble)"
+                    return (result, 95.0) if return_confidence else result
         except Exception as api_error:
             print(f"External AI error: {api_error}")
             # Continue with local model if external AI fails
             pass
             
-        # Enhanced validation for frame format
-        if frame is None or not isinstance(frame, np.ndarray) or frame.size == 0 or len(frame.shape) < 2:
-            return ("❌ Invalid frame format", 0.0) if return_confidence else "❌ Invalid frame format"
-            
-        # Convert to RGB if frame is BGR
-        if len(frame.shape) == 3 and frame.shape[2] == 3:
-            img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        else:
-            img_rgb = frame
-            
-        # Enhanced image preprocessing pipeline
-        # 1. Resize with padding to maintain aspect ratio
-        img_resized = resize_with_padding(img_rgb)
+        if predictions is None:
+            return (local_error, 0.0) if return_confidence else local_error
+                
+        # Apply temporal smoothing over this stream's recent predictions
+        window = smoothing.update(stream_id, predictions)
         
-        # 2. Apply lighting normalization for better accuracy in different lighting conditions
-        try:
-            # Convert to LAB color space
-            lab = cv2.cvtColor(img_resized, cv2.COLOR_RGB2LAB)
-            
-            # Split channels
-            l, a, b = cv2.split(lab)
-            
-            # Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) to L channel
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            cl = clahe.apply(l)
-            
-            # Merge channels back
-            limg = cv2.merge((cl, a, b))
-            
-            # Convert back to RGB color space
-            img_normalized = cv2.cvtColor(limg, cv2.COLOR_LAB2RGB)
-        except Exception as preprocess_error:
-            print(f"Preprocessing error: {preprocess_error}")
-            # Fallback to original resized image if preprocessing fails
-            img_normalized = img_resized
+        # Use weighted average for temporal smoothing (recent predictions have more weight)
+        avg_pred = window.weighted_mean()
+
+        predicted_idx = np.argmax(avg_pred)
+        predicted_class = CLASSES[predicted_idx]
+        confidence = float(avg_pred[predicted_idx])
         
-        # 3. Preprocess for MobileNetV2
-        img_array = np.expand_dims(img_normalized.astype(np.float32), axis=0)
-        img_array = preprocess_input(img_array)
+        # Dynamic confidence threshold based on prediction stability
+        stability = window.std()[predicted_idx]
+        adjusted_threshold = CONFIDENCE_THRESHOLD * (1.0 + stability * 2)  # Increase threshold for unstable predictions
 
-        # Make prediction with enhanced error handling
-        try:
-            # Use a timeout to prevent hanging on model prediction
-            import threading
-            import queue
-            
-            def predict_with_timeout(image_array, result_queue):
-                try:
-                    predictions = model.predict(image_array, verbose=0)[0]
-                    result_queue.put(predictions)
-                except Exception as e:
-                    result_queue.put(e)
-            
-            # Create a queue for the result
-            result_queue = queue.Queue()
+        if confidence < adjusted_threshold:
+            result = f"❓ Uncertain ({confidence*100:.1f}%)"
+        else:
+            result = f"{CLASS_NAMES[predicted_class]} ({confidence*100:.1f}%)"
             
-            # Start prediction in a separate thread
-            prediction_thread = threading.Thread(target=predict_with_timeout, args=(img_array, result_queue))
-            prediction_thread.daemon = True
-            prediction_thread.start()
-            
-            # Wait for the prediction with timeout
-            try:
-                predictions = result_queue.get(timeout=2.0)  # 2 second timeout
-                
-                # Check if the result is an exception
-                if isinstance(predictions, Exception):
-                    raise predictions
-                    
-                # Apply temporal smoothing with prediction buffer
-                pred_buffer.append(predictions)
-                
-                # Use weighted average for temporal smoothing (recent predictions have more weight)
-                weights = np.linspace(0.5, 1.0, len(pred_buffer))
-                weights = weights / np.sum(weights)  # Normalize weights
-                avg_pred = np.average(pred_buffer, axis=0, weights=weights)
-
-                predicted_idx = np.argmax(avg_pred)
-                predicted_class = CLASSES[predicted_idx]
-                confidence = float(avg_pred[predicted_idx])
-                
-                # Dynamic confidence threshold based on prediction stability
-                stability = np.std([p[predicted_idx] for p in pred_buffer])
-                adjusted_threshold = CONFIDENCE_THRESHOLD * (1.0 + stability * 2)  # Increase threshold for unstable predictions
-
-                if confidence < adjusted_threshold:
-                    result = f"❓ Uncertain ({confidence*100:.1f}%)"
-                else:
-                    result = f"{CLASS_NAMES[predicted_class]} ({confidence*100:.1f}%)"
-                    
-                return (result, confidence*100) if return_confidence else result
-                
-            except queue.Empty:
-                print("Model prediction timed out")
-                return ("❌ Model timeout", 0.0) if return_confidence else "❌ Model timeout"
-                
-        except Exception as model_error:
-            print(f"Model prediction error: {model_error}")
-            return ("❌ Model error", 0.0) if return_confidence else "❌ Model error"
+        return (result, confidence*100) if return_confidence else result
             
     except Exception as e:
         print(f"Error in prediction: {e}")
@@ -855,7 +782,7 @@ class BOLT_INOVATOR_WasteClassifier:
             try:
                 # Test connection
                 if url.endswith('/shot.jpg'):  # IP Webcam app
-                    response = requests.get(url, timeout=2)
+                    response = clients.http_session().get(url, timeout=2)
                     if response.status_code == 200:
                         self.ip_camera_url = url
                         self.connection_status.config(text=f"Connected to IP Webcam: {url}", fg="green")
@@ -892,7 +819,7 @@ class BOLT_INOVATOR_WasteClassifier:
         camera_type = self.camera_type_var.get()
         
         # Clear prediction buffer for new session
-        pred_buffer.clear()
+        smoothing.reset("camera")
         
         if camera_type == "local":
             # Local webcam
@@ -918,7 +845,7 @@ class BOLT_INOVATOR_WasteClassifier:
                 
                 # Test connection before starting
                 try:
-                    response = requests.get(self.ip_camera_url, timeout=2)
+                    response = clients.http_session().get(self.ip_camera_url, timeout=2)
                     if response.status_code != 200:
                         messagebox.showerror("Error", f"❌ Could not connect to IP Webcam at {self.ip_camera_url}")
                         return
@@ -1004,7 +931,7 @@ class BOLT_INOVATOR_WasteClassifier:
                 if "/shot.jpg" in self.ip_camera_url:
                     # IP Webcam app - fetch JPEG image
                     try:
-                        response = requests.get(self.ip_camera_url, timeout=1)
+                        response = clients.http_session().get(self.ip_camera_url, timeout=1)
                         if response.status_code == 200:
                             # Convert the image from the response to a cv2 image
                             img_array = np.array(bytearray(response.content), dtype=np.uint8)
@@ -1166,7 +1093,7 @@ class BOLT_INOVATOR_WasteClassifier:
                     # Multiple attempts for reliability
                     for attempt in range(3):
                         try:
-                            response = requests.get(self.ip_camera_url, timeout=2)
+                            response = clients.http_session().get(self.ip_camera_url, timeout=2)
                             if response.status_code == 200:
                                 img_array = np.array(bytearray(response.content), dtype=np.uint8)
                                 frame = cv2.imdecode(img_array, -1)
@@ -1245,7 +1172,7 @@ class BOLT_INOVATOR_WasteClassifier:
                 try:
                     # Multiple attempts for reliability
                     for attempt in range(3):
-                        response = requests.get(self.ip_camera_url, timeout=2)
+                        response = clients.http_session().get(self.ip_camera_url, timeout=2)
                         if response.status_code == 200:
                             img_array = np.array(bytearray(response.content), dtype=np.uint8)
                             frame = cv2.imdecode(img_array, -1)  # -1 means load image as is
@@ -1321,7 +1248,7 @@ class BOLT_INOVATOR_WasteClassifier:
         """Resume video stream after capturing a frame"""
         if self.is_running:
             # Clear the prediction buffer to avoid influence from the captured frame
-            pred_buffer.clear()
+            smoothing.reset("camera")
             
             # Resume the video stream
             self.update_frame()
@@ -1335,6 +1262,11 @@ class BOLT_INOVATOR_WasteClassifier:
 # Run App
 # -----------------------------
 if __name__ == "__main__":
+    # The model is loaded once per process by the shared inference module (MODEL_PATH)
+    if get_engine() is None:
+        print("❌ Error loading model: set MODEL_PATH to a .keras, .tflite or .onnx file")
+        raise SystemExit(1)
+
     root = tk.Tk()
     app = BOLT_INOVATOR_WasteClassifier(root)
     root.mainloop()
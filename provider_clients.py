@@ -0,0 +1,208 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# -----------------------------
+# Connection pool settings
+# -----------------------------
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # Hosts that keep an idle pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # Kept-alive connections per host
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", "20"))  # Open connections per API client
+AI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("AI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+AI_KEEPALIVE_EXPIRY = float(os.getenv("AI_KEEPALIVE_EXPIRY", "30"))  # Seconds an idle connection is kept
+
+# -----------------------------
+# Provider endpoints
+# -----------------------------
+# Empty means the public APIs; point both at fake_providers.py for load tests
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")  # e.g. http://127.0.0.1:8900/v1
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")  # e.g. http://127.0.0.1:8900 (REST transport)
+
+
+# Per-process registry of API clients and HTTP sessions
+class ProviderClients:
+    def __init__(self):
+        """
+        Create each provider client once per process and hand out the same instance.
+
+        Building a client (or a requests.Session) per call throws away its
+        connection pool, so every request pays for a new TCP and TLS
+        handshake. Clients are created on first use and dropped in forked
+        children, whose copies of the parent's sockets can't be shared.
+        """
+        self._clients = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.openai_base_url = OPENAI_BASE_URL or None
+        self.gemini_api_endpoint = GEMINI_API_ENDPOINT or None
+        self._gemini_api_key = None
+        self.created = 0
+        self.reused = 0
+
+        # HTTP requests made by the OpenAI client and how many opened a new connection
+        self.openai_requests = 0
+        self.openai_connects = 0
+
+    def get(self, name, factory):
+        """
+        Return the client registered under name, creating it with factory() on first use.
+
+        Args:
+            name: Registry key (e.g. "openai_async" or "gemini:<model name>")
+            factory: Zero-argument function building the client
+
+        Returns:
+            The process-wide client
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._clients = {}
+                self._pid = os.getpid()
+            client = self._clients.get(name)
+            if client is None:
+                client = self._clients[name] = factory()
+                self.created += 1
+            else:
+                self.reused += 1
+            return client
+
+    def set(self, name, client):
+        """Install a client under name (e.g. a stub used by the benchmark)."""
+        with self._lock:
+            self._clients[name] = client
+
+    def use_endpoints(self, openai_base_url=None, gemini_api_endpoint=None):
+        """
+        Send provider calls to other endpoints (e.g. fake_providers.py) from now on.
+
+        Clients already created for the old endpoints are dropped.
+
+        Args:
+            openai_base_url: OpenAI API base URL, including /v1 (None: the public API)
+            gemini_api_endpoint: Gemini API host URL (None: the public API)
+        """
+        with self._lock:
+            self.openai_base_url = openai_base_url or None
+            self.gemini_api_endpoint = gemini_api_endpoint or None
+            self._clients = {name: client for name, client in self._clients.items()
+                             if not name.startswith(("openai", "gemini"))}
+        if self._gemini_api_key:
+            self.configure_gemini(self._gemini_api_key)
+
+    # -----------------------------
+    # Provider clients
+    # -----------------------------
+    def configure_gemini(self, api_key):
+        """Configure the genai library, over REST when a custom Gemini endpoint is set."""
+        import google.generativeai as genai
+        self._gemini_api_key = api_key
+        if self.gemini_api_endpoint:
+            genai.configure(api_key=api_key, transport="rest",
+                            client_options={"api_endpoint": self.gemini_api_endpoint})
+        else:
+            genai.configure(api_key=api_key)
+
+    @property
+    def gemini_rest(self):
+        """Whether Gemini calls go over REST, which the genai async client doesn't support."""
+        return bool(self.gemini_api_endpoint)
+
+    def gemini_model(self, model_name):
+        """GenerativeModel for model_name; the genai library keeps one gRPC channel underneath."""
+        import google.generativeai as genai
+        return self.get(f"gemini:{model_name}", lambda: genai.GenerativeModel(model_name))
+
+    def openai_async(self):
+        """AsyncOpenAI client with a bounded keep-alive pool (used from the background event loop)."""
+        return self.get("openai_async", self._create_openai_async)
+
+    def http_session(self):
+        """requests.Session whose per-host pools keep connections alive between calls."""
+        return self.get("http", self._create_http_session)
+
+    def _openai_limits(self):
+        import httpx
+        return httpx.Limits(
+            max_connections=AI_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=AI_KEEPALIVE_EXPIRY
+        )
+
+    def _create_openai_async(self):
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        async def trace(event, info):
+            if event == "connection.connect_tcp.started":
+                self.openai_connects += 1
+
+        async def on_request(request):
+            self.openai_requests += 1
+            request.extensions["trace"] = trace
+
+        http_client = DefaultAsyncHttpxClient(limits=self._openai_limits(), event_hooks={"request": [on_request]})
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=self.openai_base_url, http_client=http_client)
+
+    def _create_http_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    # -----------------------------
+    # Statistics
+    # -----------------------------
+    def _http_pool_statistics(self):
+        """Requests and new connections across the session's live urllib3 pools."""
+        requests_made = connections = 0
+        with self._lock:
+            session = self._clients.get("http") if self._pid == os.getpid() else None
+        if session is not None:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        requests_made += pool.num_requests
+                        connections += pool.num_connections
+        return requests_made, connections
+
+    def get_statistics(self):
+        """
+        Get statistics about client and connection reuse.
+
+        Returns:
+            Dictionary with registry hits, and per transport the number of
+            requests, new connections and the fraction of requests that
+            reused a kept-alive connection
+        """
+        def reuse(requests_made, connections):
+            return {
+                "requests": requests_made,
+                "connections": connections,
+                "reuse_rate": max(0.0, 1.0 - connections / requests_made) if requests_made else 0.0
+            }
+
+        with self._lock:
+            clients = sorted(self._clients)
+            created, reused = self.created, self.reused
+        return {
+            "clients": clients,
+            "created": created,
+            "reused": reused,
+            "http": reuse(*self._http_pool_statistics()),
+            "openai": reuse(self.openai_requests, self.openai_connects),
+            "endpoints": {
+                "openai": self.openai_base_url or "default",
+                "gemini": self.gemini_api_endpoint or "default"
+            },
+            "pool_maxsize": HTTP_POOL_MAXSIZE,
+            "ai_max_connections": AI_MAX_CONNECTIONS,
+            "ai_max_keepalive_connections": AI_MAX_KEEPALIVE_CONNECTIONS
+        }
+
+
+# Shared by every module in this process
+clients = ProviderClients()
@@ -0,0 +1,224 @@
+import os
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+# -----------------------------
+# Latency tracking settings
+# -----------------------------
+AI_LATENCY_WINDOW = int(os.getenv("AI_LATENCY_WINDOW", "200"))  # Recent calls kept per provider
+AI_LATENCY_MIN_SAMPLES = int(os.getenv("AI_LATENCY_MIN_SAMPLES", "20"))  # Calls needed before percentiles are trusted
+
+# -----------------------------
+# Circuit breaker settings
+# -----------------------------
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "5"))  # Consecutive failures that open the circuit
+AI_BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", "30"))  # Seconds open before a trial call
+AI_TIMEOUT_MULTIPLIER = float(os.getenv("AI_TIMEOUT_MULTIPLIER", "3"))  # Timeout = multiplier * observed p99
+AI_TIMEOUT_MIN = float(os.getenv("AI_TIMEOUT_MIN", "1.0"))
+AI_TIMEOUT_MAX = float(os.getenv("AI_TIMEOUT_MAX", os.getenv("AI_PROVIDER_TIMEOUT", "10")))
+
+
+# Rolling latency window for one provider
+class LatencyTracker:
+    def __init__(self, window=AI_LATENCY_WINDOW, min_samples=AI_LATENCY_MIN_SAMPLES):
+        """
+        Keep the latencies of a provider's most recent successful calls.
+
+        Args:
+            window: Number of recent calls kept
+            min_samples: Calls needed before percentile() reports observed values
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.censored = 0
+
+    def record(self, seconds, censored=False):
+        """
+        Add one call's latency.
+
+        Args:
+            seconds: Time the call took
+            censored: The call was cancelled before it finished, so seconds is
+                only a lower bound; keeping it stops slow calls that get
+                cancelled (e.g. by hedging) from dropping out of the window
+        """
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.censored += censored
+
+    def percentile(self, q, default=None):
+        """
+        Observed latency percentile in seconds.
+
+        Args:
+            q: Percentile between 0 and 100
+            default: Returned while fewer than min_samples calls were recorded
+
+        Returns:
+            Latency in seconds, or default
+        """
+        with self._lock:
+            if len(self._samples) < max(1, self.min_samples):
+                return default
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        return float(np.percentile(samples, q))
+
+    def get_statistics(self):
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+            count, censored = self.count, self.censored
+        if samples.size == 0:
+            return {"calls": count, "censored": censored, "samples": 0}
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99]) * 1000.0
+        return {
+            "calls": count,
+            "censored": censored,
+            "samples": int(samples.size),
+            "p50_ms": round(float(p50), 1),
+            "p90_ms": round(float(p90), 1),
+            "p99_ms": round(float(p99), 1)
+        }
+
+
+# Per-provider circuit breaker
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, latency=None, failures=AI_BREAKER_FAILURES, cooldown=AI_BREAKER_COOLDOWN,
+                 timeout_multiplier=AI_TIMEOUT_MULTIPLIER, min_timeout=AI_TIMEOUT_MIN, max_timeout=AI_TIMEOUT_MAX):
+        """
+        Stop calling a provider that keeps failing, and time its calls from observed latency.
+
+        Closed: calls go through. After `failures` consecutive failures the
+        circuit opens and calls are rejected without waiting. After `cooldown`
+        seconds it is half-open: a single trial call goes through, closing
+        the circuit on success and reopening it on failure.
+
+        Args:
+            name: Provider name, for logging
+            latency: The provider's LatencyTracker (drives timeout())
+            failures: Consecutive failures that open the circuit
+            cooldown: Seconds the circuit stays open before a trial call
+            timeout_multiplier: Timeout as a multiple of the observed p99 latency
+            min_timeout: Lower bound of the adaptive timeout in seconds
+            max_timeout: Upper bound, also used until enough calls are observed
+        """
+        self.name = name
+        self.latency = latency or LatencyTracker()
+        self.failure_threshold = max(1, failures)
+        self.cooldown = cooldown
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.consecutive_failures = 0
+        self.failure_count = 0
+        self.success_count = 0
+        self.rejected_count = 0
+        self.open_count = 0
+        self.last_error = None
+
+    def _current_state(self, now):
+        if self._state == self.OPEN and now - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def is_open(self):
+        """Whether a call would be rejected right now (without claiming the half-open trial)."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight)
+
+    def allow(self):
+        """Claim permission for one call; False (and counted as rejected) while open."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected_count += 1
+            return False
+
+    def timeout(self):
+        """Seconds to give the next call: timeout_multiplier * p99, within [min_timeout, max_timeout]."""
+        p99 = self.latency.percentile(99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.timeout_multiplier * p99))
+
+    def record_success(self, seconds=None):
+        if seconds is not None:
+            self.latency.record(seconds)
+        with self._lock:
+            closing = self._state != self.CLOSED
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+            self.consecutive_failures = 0
+            self.success_count += 1
+        if closing:
+            print(f"✅ {self.name} circuit closed")
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._trial_in_flight = False
+            self.consecutive_failures += 1
+            self.failure_count += 1
+            self.last_error = error
+            opening = self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            )
+            if opening:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.open_count += 1
+        if opening:
+            print(f"⚠️ {self.name} circuit opened for {self.cooldown:g}s after {self.consecutive_failures} failure(s): {error}")
+
+    def release(self, seconds=None):
+        """
+        Give back a claimed call that ended without a verdict (e.g. cancelled).
+
+        Args:
+            seconds: Time the call ran before it was cancelled, recorded as a
+                censored latency sample
+        """
+        if seconds is not None:
+            self.latency.record(seconds, censored=True)
+        with self._lock:
+            self._trial_in_flight = False
+
+    def get_statistics(self):
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            stats = {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "failures": self.failure_count,
+                "successes": self.success_count,
+                "rejected": self.rejected_count,
+                "opened": self.open_count,
+                "last_error": self.last_error
+            }
+            if state == self.OPEN:
+                stats["retry_in_s"] = round(max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1)
+        stats["timeout_s"] = round(self.timeout(), 3)
+        return stats
@@ -0,0 +1,156 @@
+import os
+import time
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: each process keeps its own bucket
+    fcntl = None
+
+# -----------------------------
+# Quota settings
+# -----------------------------
+# Every worker process on the host shares the buckets stored in this directory
+AI_RATE_LIMIT_DIR = os.getenv("AI_RATE_LIMIT_DIR", os.path.join(tempfile.gettempdir(), "waste-classifier-quota"))
+
+def provider_limits(name):
+    """
+    Rate and budget limits for a provider, from AI_<NAME>_RPS, AI_<NAME>_BURST and AI_<NAME>_DAILY_BUDGET.
+
+    Limits are opt-in: both default to 0.
+
+    Returns:
+        Tuple (requests per second, burst size, calls per UTC day); 0 means unlimited
+    """
+    prefix = f"AI_{name.upper()}_"
+    rate = float(os.getenv(prefix + "RPS", "0"))
+    burst = float(os.getenv(prefix + "BURST", str(max(1.0, rate * 2))))
+    daily_budget = int(os.getenv(prefix + "DAILY_BUDGET", "0"))
+    return rate, burst, daily_budget
+
+# tokens, time of last refill (Unix seconds), UTC day number, calls made that day
+_STATE = struct.Struct("=ddqq")
+
+
+# Token bucket shared by every process on the host
+class SharedTokenBucket:
+    def __init__(self, name, rate, burst, daily_budget=0, directory=AI_RATE_LIMIT_DIR):
+        """
+        Limit a provider's calls across all worker processes through a small state file.
+
+        Each acquire locks the file (flock), refills the bucket for the time
+        elapsed since the last call, and takes a token if one is left and
+        the day's budget isn't spent. It never waits: a caller that is
+        refused is expected to use another provider or the local model.
+
+        Args:
+            name: Provider name (also the state file name)
+            rate: Tokens added per second (0 disables the rate limit)
+            burst: Bucket size, i.e. calls allowed back to back
+            daily_budget: Calls allowed per UTC day (0 disables the budget)
+            directory: Directory holding the state files
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.daily_budget = daily_budget
+        self.path = os.path.join(directory, f"{name}.bucket")
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # In-process state, used when fcntl isn't available
+        self._state = None
+
+        # Statistics (this process)
+        self.granted = 0
+        self.rate_limited = 0
+        self.budget_refused = 0
+
+    @property
+    def unlimited(self):
+        return self.rate <= 0 and self.daily_budget <= 0
+
+    def _file(self):
+        # A descriptor inherited over fork shares its lock with the parent, so each process opens its own
+        if self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    @contextmanager
+    def _locked_state(self):
+        """Yield the bucket state as a list [tokens, updated, day, used] and write it back afterwards."""
+        now = time.time()
+        fresh = [self.burst, now, int(now // 86400), 0]
+        with self._lock:
+            if fcntl is None:
+                if self._state is None:
+                    self._state = fresh
+                yield self._state
+                return
+            fd = self._file()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(fd, _STATE.size, 0)
+                state = list(_STATE.unpack(data)) if len(data) == _STATE.size else fresh
+                yield state
+                os.pwrite(fd, _STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        state[0] = min(self.burst, state[0] + max(0.0, now - state[1]) * self.rate)
+        state[1] = now
+        today = int(now // 86400)
+        if state[2] != today:
+            state[2], state[3] = today, 0
+
+    def try_acquire(self):
+        """Take one call's worth of quota if available; never blocks on an empty bucket."""
+        if self.unlimited:
+            with self._lock:
+                self.granted += 1
+            return True
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            if self.daily_budget > 0 and state[3] >= self.daily_budget:
+                self.budget_refused += 1
+                return False
+            if self.rate > 0 and state[0] < 1.0:
+                self.rate_limited += 1
+                return False
+            if self.rate > 0:
+                state[0] -= 1.0
+            state[3] += 1
+            self.granted += 1
+            return True
+
+    def budget_spent(self):
+        """Whether today's budget is used up (the provider is out until the next UTC day)."""
+        if self.daily_budget <= 0:
+            return False
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            return state[3] >= self.daily_budget
+
+    def get_statistics(self):
+        stats = {
+            "rps": self.rate,
+            "burst": self.burst,
+            "daily_budget": self.daily_budget,
+            "granted": self.granted,
+            "rate_limited": self.rate_limited,
+            "budget_refused": self.budget_refused,
+            "shared": fcntl is not None
+        }
+        if not self.unlimited:
+            with self._locked_state() as state:
+                self._refill(state, time.time())
+                stats["tokens"] = round(state[0], 2)
+                stats["used_today"] = state[3]
+        return stats
@@ -1,7 +1,9 @@
 import os
 import io
+import sys
 import base64
 from dotenv import load_dotenv
+from eventlet import tpool
 from flask import Flask, render_template, request, jsonify
 from flask_socketio import SocketIO
 from flask_cors import CORS
@@ -11,24 +13,34 @@ import numpy as np
 # Load environment variables from .env file
 load_dotenv()
 
+# The shared modules (inference, prediction_cache, ai_integration) live in the
+# repository root, which isn't on the path when the app runs from its own directory
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# Recent frames per Socket.IO client, matched by perceptual hash (optional)
+try:
+    from prediction_cache import NearDuplicateCache
+    frame_cache = NearDuplicateCache()
+except ImportError as e:
+    print(f"⚠️ Frame cache disabled, prediction_cache could not be imported: {e}")
+    frame_cache = None
+
 # Initialize the Flask app
 app = Flask(__name__)
 CORS(app) # Enable Cross-Origin Resource Sharing for all routes
 socketio = SocketIO(app, async_mode='eventlet')
 
 # --- Model Loading ---
-# This is a placeholder for your actual model loading logic.
-# The application will look for the model file specified in the .env file.
-model_path = os.getenv('MODEL_PATH')
+# The shared inference module loads the model from MODEL_PATH (set in the .env
+# file) once per process, on the first prediction that needs it.
 try:
-    # Replace this with your actual model loading code, e.g., using joblib or tensorflow
-    # model = joblib.load(model_path)
-    print(f"--- Model would be loaded from path: {model_path} ---")
-    # For demonstration, we'll use a placeholder object.
-    model = "YOUR_ML_MODEL_OBJECT"
-except FileNotFoundError:
-    print(f"--- WARNING: Model file not found at {model_path}. Using mock predictions. ---")
-    model = None
+    from inference import get_engine
+except ImportError as e:
+    print(f"⚠️ Local model disabled (mock predictions only), inference could not be imported: {e}")
+    def get_engine():
+        return None
 
 # --- Prediction Logic ---
 def predict_image(image_data):
@@ -36,12 +48,30 @@ def predict_image(image_data):
     This function takes a Pillow Image object, processes it, and returns a prediction.
     Uses the optimized prediction pipeline for higher accuracy.
     """
+    # Run the local model once; its answer feeds both classify_waste's cascade
+    # and the local fallback below. The engine applies the shared preprocessing
+    # pipeline: letterbox to 224x224, CLAHE lighting normalization and
+    # MobileNetV2 [-1, 1] scaling
+    engine = get_engine()
+    predictions = None
+    local = None
+    if engine is not None:
+        try:
+            predictions = engine.predict_image(np.asarray(image_data.convert("RGB")))
+        except Exception as model_error:
+            # Reported by the fallback below; passed on (as predict_local_model would) so classify_waste doesn't rerun the model
+            local = {"source": "local", "error": str(model_error), "class_name": "Error", "confidence": 0}
+    
     try:
         # Import the optimized waste classification function
         from ai_integration import classify_waste
+        from inference import local_result
+        
+        if predictions is not None:
+            local = local_result(predictions)
         
         # Use the ensemble prediction method for higher accuracy
-        result = classify_waste(image_data, use_ensemble=True, confidence_threshold=0.65)
+        result = classify_waste(image_data, use_ensemble=True, confidence_threshold=0.65, local_result=local)
         
         if result:
             # We got a valid prediction from the ensemble system
@@ -55,39 +85,16 @@ def predict_image(image_data):
         # Continue with local model if ensemble fails
         pass
     
-    # Fallback to local model if ensemble method fails
+    # Fallback to the local model's answer if ensemble method fails
     try:
-        # Resize image to what the model expects
-        image_data = image_data.resize((224, 224))
-        image_array = np.array(image_data)
-        
-        # Apply enhanced preprocessing
-        # Convert to LAB color space for lighting normalization
-        import cv2
-        img_rgb = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-        lab = cv2.cvtColor(img_rgb, cv2.COLOR_BGR2LAB)
-        
-        # Split channels and apply CLAHE to L channel
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        cl = clahe.apply(l)
-        
-        # Merge channels and convert back to RGB
-        limg = cv2.merge((cl, a, b))
-        img_normalized = cv2.cvtColor(limg, cv2.COLOR_LAB2RGB)
-        
-        # Normalize and expand dimensions for model input
-        img_normalized = img_normalized / 255.0
-        img_array = np.expand_dims(img_normalized, axis=0)
-
-        if model is None:
+        if engine is None:
             # Mock prediction if the model file isn't found
             import random
             prediction = random.choice(['Recyclable', 'Organic', 'Hazardous'])
             confidence = random.uniform(0.75, 0.98)
         else:
-            # Get prediction from model
-            predictions = model.predict(img_array, verbose=0)[0]
+            if predictions is None:
+                raise RuntimeError(local["error"])
             
             # Get predicted class and confidence
             predicted_idx = np.argmax(predictions)
@@ -133,7 +140,7 @@ def predict_upload():
         try:
             # Read the image file, convert to RGB, and get prediction
             image = Image.open(file.stream).convert("RGB")
-            result = predict_image(image)
+            result = tpool.execute(predict_image, image)
             return jsonify(result)
         except Exception as e:
             return jsonify({'error': f'Could not process image: {e}'}), 500
@@ -148,14 +155,33 @@ def handle_video_frame(data_url):
     try:
         # The client sends a base64-encoded data URL, so we strip the header
         image_data = base64.b64decode(data_url.split(',')[1])
-        image = Image.open(io.BytesIO(image_data))
-        result = predict_image(image)
+        image = Image.open(io.BytesIO(image_data)).convert("RGB")
+        
+        # Frames of a static scene are nearly identical: reuse the last result
+        if frame_cache is not None:
+            cached, frame_hash = frame_cache.lookup(request.sid, image)
+            if cached is not None:
+                socketio.emit('prediction_result', cached)
+                return
+        
+        # predict_image blocks on the model and the provider calls (Future.result,
+        # run_async), and nothing is monkey patched: run it on eventlet's native
+        # thread pool so the hub keeps serving the other clients meanwhile
+        result = tpool.execute(predict_image, image)
+        if frame_cache is not None and 'error' not in result:
+            frame_cache.store(request.sid, frame_hash, result)
         # Emit the result back to the specific client that sent the frame
         socketio.emit('prediction_result', result)
     except Exception as e:
         # Silently ignore errors to prevent spamming logs on bad frames
         pass
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Forget the frame history of a client that disconnected."""
+    if frame_cache is not None:
+        frame_cache.drop(request.sid)
+
 # --- Main Execution ---
 if __name__ == '__main__':
     print("Starting Flask development server...")
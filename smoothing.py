@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# -----------------------------
+# Smoothing settings
+# -----------------------------
+SMOOTHING_WINDOW = int(os.getenv("SMOOTHING_WINDOW", "10"))  # Predictions kept per stream
+SMOOTHING_IDLE_TTL = float(os.getenv("SMOOTHING_IDLE_TTL", "60"))  # Seconds before an idle stream is dropped
+SMOOTHING_MAX_STREAMS = int(os.getenv("SMOOTHING_MAX_STREAMS", "1024"))
+
+
+# Sliding window over one stream's predictions
+class PredictionWindow:
+    def __init__(self, num_classes, window=SMOOTHING_WINDOW, oldest_weight=0.5):
+        """
+        Fixed-size ring buffer of prediction vectors with running sums.
+
+        Keeps S = sum(x), T = sum(i * x) (i = 0 for the oldest entry) and
+        Q = sum(x ** 2), so the plain mean, the linearly weighted mean and
+        the standard deviation are all O(1) per update instead of being
+        recomputed over the whole window for every frame.
+
+        Args:
+            num_classes: Length of each prediction vector
+            window: Number of predictions kept
+            oldest_weight: Weight of the oldest prediction relative to the
+                newest (weights rise linearly from it to 1.0)
+        """
+        self.window = window
+        self.oldest_weight = oldest_weight
+        self.buffer = np.zeros((window, num_classes))
+        self.count = 0
+        self.head = 0  # Slot of the oldest entry once the buffer is full
+        self.total = np.zeros(num_classes)
+        self.positional = np.zeros(num_classes)
+        self.squares = np.zeros(num_classes)
+
+    def update(self, predictions):
+        """Add one prediction vector, evicting the oldest when the window is full."""
+        x = np.asarray(predictions, dtype=np.float64)
+        if self.count == self.window:
+            oldest = self.buffer[self.head]
+            # Every remaining entry moves one position closer to the start
+            self.positional -= self.total - oldest
+            self.total -= oldest
+            self.squares -= oldest * oldest
+            slot = self.head
+            self.head = (self.head + 1) % self.window
+            position = self.window - 1
+        else:
+            slot = position = self.count
+            self.count += 1
+        self.buffer[slot] = x
+        self.positional += position * x
+        self.total += x
+        self.squares += x * x
+        return self
+
+    def mean(self):
+        """Unweighted mean of the window."""
+        return self.total / self.count
+
+    def weighted_mean(self):
+        """Mean with weights rising linearly from oldest_weight (oldest) to 1.0 (newest)."""
+        n = self.count
+        if n == 1:
+            return self.total.copy()
+        step = (1.0 - self.oldest_weight) / (n - 1)
+        weight_sum = self.oldest_weight * n + step * n * (n - 1) / 2
+        return (self.oldest_weight * self.total + step * self.positional) / weight_sum
+
+    def std(self):
+        """Per-class standard deviation over the window."""
+        mean = self.total / self.count
+        return np.sqrt(np.maximum(self.squares / self.count - mean * mean, 0.0))
+
+    def reset(self):
+        self.count = self.head = 0
+        self.total[:] = self.positional[:] = self.squares[:] = 0.0
+
+
+# Per-stream smoothing state
+class SmoothingStore:
+    def __init__(self, window=SMOOTHING_WINDOW, idle_ttl=SMOOTHING_IDLE_TTL, max_streams=SMOOTHING_MAX_STREAMS):
+        """
+        Keep a separate PredictionWindow per camera stream or client session.
+
+        Args:
+            window: Predictions kept per stream
+            idle_ttl: Seconds without an update before a stream is dropped
+            max_streams: Maximum number of streams tracked at once
+        """
+        self.window = window
+        self.idle_ttl = idle_ttl
+        self.max_streams = max_streams
+        self._streams = OrderedDict()  # stream_id -> (last_update, PredictionWindow), oldest first
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def update(self, stream_id, predictions):
+        """
+        Add a prediction to a stream and return its window.
+
+        Args:
+            stream_id: Camera or session identifier
+            predictions: Class probability vector
+
+        Returns:
+            The stream's PredictionWindow (read its means while the caller owns the stream)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._streams.pop(stream_id, None)
+            window = entry[1] if entry is not None else PredictionWindow(len(predictions), self.window)
+            self._streams[stream_id] = (now, window)
+            while len(self._streams) > self.max_streams:
+                self._streams.popitem(last=False)
+                self.evicted += 1
+            return window.update(predictions)
+
+    def reset(self, stream_id):
+        """Forget a stream's history (e.g. after switching cameras)."""
+        with self._lock:
+            self._streams.pop(stream_id, None)
+
+    def _evict_idle(self, now):
+        # Streams are ordered by last update, so only the front can be idle
+        while self._streams:
+            stream_id, (last_update, _) = next(iter(self._streams.items()))
+            if now - last_update < self.idle_ttl:
+                break
+            del self._streams[stream_id]
+            self.evicted += 1
+
+    def get_statistics(self):
+        with self._lock:
+            return {
+                "streams": len(self._streams),
+                "window": self.window,
+                "idle_ttl": self.idle_ttl,
+                "evicted": self.evicted
+            }
@@ -11,6 +11,8 @@ const isWidget = urlParams.get('widget') === 'true';
 const autoStart = urlParams.get('autoStart') === 'true';
 const showWebcam = urlParams.get('showWebcam') !== 'false';
 const showUpload = urlParams.get('showUpload') !== 'false';
+// Webcam frames are sent as binary JPEG Blobs by default; ?upload=base64 uses the legacy JSON format
+const uploadMode = urlParams.get('upload') === 'base64' ? 'base64' : 'blob';
 
 // DOM Elements
 const webcamElement = document.getElementById('webcam');
@@ -47,6 +49,11 @@ let captureContent = document.getElementById('capture-content');
 // API endpoint
 const API_ENDPOINT = '/api/predict';
 
+// Identifies this page's webcam stream so the server can reuse results for near-identical frames
+const SESSION_ID = (window.crypto && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : Date.now().toString(36) + Math.random().toString(36).slice(2);
+
 // Hide elements based on widget configuration
 document.addEventListener('DOMContentLoaded', function() {
     // Hide webcam section if not needed
@@ -240,11 +247,15 @@ function captureImage() {
         canvasElement.height = webcamElement.videoHeight;
         context.drawImage(webcamElement, 0, 0, canvasElement.width, canvasElement.height);
         
-        // Get image data as base64
-        const imageData = canvasElement.toDataURL('image/jpeg');
+        // Get image data as a binary Blob (or base64 in legacy mode)
+        const imageData = uploadMode === 'blob'
+            ? canvasToBlob(canvasElement, 'image/jpeg', 0.9)
+            : Promise.resolve(canvasElement.toDataURL('image/jpeg'));
         
         // Classify the captured image
-        classifyImage(imageData)
+        imageData
+            .then(classifyImage)
+            .catch(error => console.error('Error encoding frame:', error))
             .finally(() => {
                 // Re-enable the capture button when processing is complete
                 captureImageBtn.disabled = false;
@@ -265,6 +276,21 @@ function captureImage() {
     }
 }
 
+/**
+ * Encode a canvas as an image Blob
+ */
+function canvasToBlob(canvas, type, quality) {
+    return new Promise((resolve, reject) => {
+        canvas.toBlob(blob => {
+            if (blob) {
+                resolve(blob);
+            } else {
+                reject(new Error('Failed to encode frame'));
+            }
+        }, type, quality);
+    });
+}
+
 /**
  * Start continuous classification
  */
@@ -311,7 +337,17 @@ async function classifyImage(imageData) {
         // Handle different types of input
         let fetchOptions = {};
         
-        if (typeof imageData === 'string' && imageData.startsWith('data:image')) {
+        if (imageData instanceof Blob) {
+            // Handle raw binary image (no base64 inflation, decoded straight from the request body)
+            fetchOptions = {
+                method: 'POST',
+                headers: {
+                    'Content-Type': imageData.type || 'image/jpeg',
+                    'X-Session-ID': SESSION_ID
+                },
+                body: imageData
+            };
+        } else if (typeof imageData === 'string' && imageData.startsWith('data:image')) {
             // Handle base64 image data
             const requestData = {
                 image_data: imageData.split(',')[1] // Remove data URL prefix
@@ -320,7 +356,8 @@ async function classifyImage(imageData) {
             fetchOptions = {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Session-ID': SESSION_ID
                 },
                 body: JSON.stringify(requestData)
             };
@@ -548,39 +585,55 @@ function captureMobileImage() {
         tempCanvas.height = mobileCamera.videoHeight;
         context.drawImage(mobileCamera, 0, 0, tempCanvas.width, tempCanvas.height);
         
-        // Get image data as base64
-        const imageData = tempCanvas.toDataURL('image/jpeg');
-        
-        // Show preview
-        imagePreview.src = imageData;
-        imagePreview.style.display = 'block';
-        mobileCamera.style.display = 'none';
-        
-        if (mobileCaptureBtn) mobileCaptureBtn.style.display = 'none';
-        if (retakeBtn) retakeBtn.style.display = 'inline-block';
-        if (classifyBtn) classifyBtn.style.display = 'inline-block';
+        // Get image data as a binary Blob (or base64 in legacy mode), like captureImage
+        const imageData = uploadMode === 'blob'
+            ? canvasToBlob(tempCanvas, 'image/jpeg', 0.9)
+            : Promise.resolve(tempCanvas.toDataURL('image/jpeg'));
         
-        // Stop the camera stream
-        stopMobileCamera();
+        imageData
+            .then(data => {
+                // Show preview
+                if (imagePreview.src.startsWith('blob:')) {
+                    URL.revokeObjectURL(imagePreview.src);
+                }
+                imagePreview.src = data instanceof Blob ? URL.createObjectURL(data) : data;
+                imagePreview.style.display = 'block';
+                mobileCamera.style.display = 'none';
+                
+                if (mobileCaptureBtn) mobileCaptureBtn.style.display = 'none';
+                if (retakeBtn) retakeBtn.style.display = 'inline-block';
+                
+                // Stop the camera stream
+                stopMobileCamera();
+                
+                // Classify the captured image
+                return classifyImage(data);
+            })
+            .catch(showMobileCaptureError);
         
     } catch (error) {
-        console.error('Error capturing mobile image:', error);
-        
-        // Show error message
-        const errorMessage = document.createElement('div');
-        errorMessage.className = 'camera-error';
-        errorMessage.textContent = 'Capture failed: ' + (error.message || 'Unknown error');
-        
-        // Insert error message
-        if (mobileCamera.parentNode) {
-            mobileCamera.parentNode.insertBefore(errorMessage, mobileCamera);
-        }
-        
-        // Re-enable the button
-        if (mobileCaptureBtn) {
-            mobileCaptureBtn.disabled = false;
-            mobileCaptureBtn.classList.remove('processing');
-        }
+        showMobileCaptureError(error);
+    }
+}
+
+// Function to report a failed mobile capture
+function showMobileCaptureError(error) {
+    console.error('Error capturing mobile image:', error);
+    
+    // Show error message
+    const errorMessage = document.createElement('div');
+    errorMessage.className = 'camera-error';
+    errorMessage.textContent = 'Capture failed: ' + (error.message || 'Unknown error');
+    
+    // Insert error message
+    if (mobileCamera.parentNode) {
+        mobileCamera.parentNode.insertBefore(errorMessage, mobileCamera);
+    }
+    
+    // Re-enable the button
+    if (mobileCaptureBtn) {
+        mobileCaptureBtn.disabled = false;
+        mobileCaptureBtn.classList.remove('processing');
     }
 }
 
@@ -1077,11 +1130,15 @@ window.WasteClassifierWidget = {
                 widgetElements.canvas.height = widgetElements.webcam.videoHeight;
                 context.drawImage(widgetElements.webcam, 0, 0, widgetElements.canvas.width, widgetElements.canvas.height);
                 
-                // Get image data
-                const imageData = widgetElements.canvas.toDataURL('image/jpeg');
+                // Get image data as a binary Blob (or base64 in legacy mode)
+                const imageData = uploadMode === 'blob'
+                    ? canvasToBlob(widgetElements.canvas, 'image/jpeg', 0.9)
+                    : Promise.resolve(widgetElements.canvas.toDataURL('image/jpeg'));
                 
                 // Classify
-                widgetClassifyImage(imageData)
+                imageData
+                    .then(widgetClassifyImage)
+                    .catch(error => console.error('Error encoding widget frame:', error))
                     .finally(() => {
                         // Re-enable the capture button when processing is complete
                         widgetElements.captureBtn.disabled = false;
@@ -1108,18 +1165,20 @@ window.WasteClassifierWidget = {
             widgetElements.overlay.className = 'widget-overlay processing';
             
             try {
-                // Prepare data
-                const requestData = {
+                // Prepare data: raw binary JPEG, or base64 JSON in legacy mode
+                const isBlob = imageData instanceof Blob;
+                const body = isBlob ? imageData : JSON.stringify({
                     image_data: imageData.split(',')[1]
-                };
+                });
                 
                 // Call API
                 const response = await fetch(options.apiEndpoint || API_ENDPOINT, {
                     method: 'POST',
                     headers: {
-                        'Content-Type': 'application/json'
+                        'Content-Type': isBlob ? (imageData.type || 'image/jpeg') : 'application/json',
+                        'X-Session-ID': SESSION_ID
                     },
-                    body: JSON.stringify(requestData)
+                    body: body
                 });
                 
                 if (!response.ok) {